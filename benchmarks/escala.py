@@ -0,0 +1,148 @@
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import daniel_birds
+from daniel_birds import baralho_inicial, carregar_dataset, proporcoes_alvo, recozer, solve
+from sintetico import gerar_csv
+
+# ==== CONFIGURAÇÃO DO BENCHMARK ====
+ESCALAS = [170, 1000, 10000, 100000]  # aves por base sintética (170 ≈ a base de verdade)
+ALVOS = {"TAMANHO E COR": 28, "TIPO DE NINHO": 25, "2 PONTOS": 20, "GEOGRAFIA": 35, "HABITATS": 45}
+TOTAL_AVES = 60
+TOLERANCIA = 2.0
+ITERACOES_VAZAO = 20000  # iterações do laço medidas para a vazão
+SEMENTES = [1, 2, 3]  # uma execução de tempo até a tolerância por semente
+
+def versao_do_codigo():
+    # Commit atual, quando a pasta é um repositório git (para comparar execuções ao longo do tempo)
+    try:
+        saida = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+                               cwd=os.path.dirname(os.path.abspath(daniel_birds.__file__)))
+    except OSError:
+        return None
+    return saida.stdout.strip() or None
+
+def medir_vazao(dataset, proporcoes_alvo_caracteristica, total_aves, iteracoes, semente):
+    # Tolerância negativa nunca é atingida: o recozimento faz todas as iterações. Sem polimento, mede só o laço.
+    inicio_laco = []
+    polimento = daniel_birds.SA_POLIMENTO
+    daniel_birds.SA_POLIMENTO = False
+    try:
+        t = time.perf_counter()
+        resultado = recozer(dataset, proporcoes_alvo_caracteristica, -1, total_aves, [], semente, max_iteracoes=iteracoes,
+                            ao_melhorar=lambda b, e, s: inicio_laco or inicio_laco.append(time.perf_counter()))
+        fim = time.perf_counter()
+    finally:
+        daniel_birds.SA_POLIMENTO = polimento
+    segundos = fim - (inicio_laco[0] if inicio_laco else t)
+    return resultado["iteracoes"] / segundos if segundos > 0 else None
+
+def medir_escala(pasta, n_aves, args):
+    caminho = gerar_csv(os.path.join(pasta, f"aves_{n_aves}.csv"), n_aves, args.semente_base, args.densidade)
+    t = time.perf_counter()
+    dataset = carregar_dataset(caminho, usar_cache=True)  # primeira leitura: CSV + gravação do cache
+    carga = time.perf_counter() - t
+    t = time.perf_counter()
+    carregar_dataset(caminho, usar_cache=True)
+    carga_cache = time.perf_counter() - t
+
+    proporcoes_alvo_caracteristica = proporcoes_alvo(ALVOS)
+    t = time.perf_counter()
+    baralho_inicial(dataset, args.aves, proporcoes_alvo_caracteristica, [], random.Random(args.semente_base))
+    inicializacao = time.perf_counter() - t
+
+    vazao = medir_vazao(dataset, proporcoes_alvo_caracteristica, args.aves, args.iteracoes, args.semente_base)
+
+    execucoes = []
+    for semente in args.sementes:
+        resultado = solve(dataset, ALVOS, args.tolerancia, args.aves, seed=semente, motor=args.motor)
+        execucoes.append({
+            "semente": semente,
+            "sucesso": resultado.sucesso,
+            "segundos": resultado.segundos,
+            "iteracoes": resultado.iteracoes,
+            "energia": resultado.energia if math.isfinite(resultado.energia) else None,
+        })
+    tempos = [e["segundos"] for e in execucoes if e["sucesso"]]
+    return {
+        "aves": n_aves,
+        "carga_s": carga,
+        "carga_cache_s": carga_cache,
+        "inicializacao_s": inicializacao,
+        "iteracoes_por_s": vazao,
+        "sucessos": len(tempos),
+        "execucoes": len(execucoes),
+        "tempo_ate_tolerancia_mediana_s": statistics.median(tempos) if tempos else None,
+        "detalhes": execucoes,
+    }
+
+def comparar(anterior, atual):
+    # Uma linha por escala presente nos dois relatórios: razão atual/anterior de cada medida
+    antes = {m["aves"]: m for m in anterior["escalas"]}
+    print(f"Comparando com {anterior.get('commit') or '?'} ({anterior.get('data')}):", file=sys.stderr)
+    for medida in atual["escalas"]:
+        velha = antes.get(medida["aves"])
+        if velha is None:
+            continue
+        partes = []
+        for chave in ("carga_s", "inicializacao_s", "iteracoes_por_s", "tempo_ate_tolerancia_mediana_s"):
+            if medida[chave] and velha[chave]:
+                partes.append(f"{chave} x{medida[chave] / velha[chave]:.2f}")
+        print(f"{medida['aves']:>7} aves | " + " | ".join(partes), file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de escala do gerador de baralhos (bases sintéticas)")
+    parser.add_argument("--escalas", type=int, nargs="+", default=ESCALAS, help="aves por base sintética")
+    parser.add_argument("--densidade", type=float, default=1.0, help="multiplica a chance de X de cada coluna")
+    parser.add_argument("--aves", type=int, default=TOTAL_AVES, help="aves no baralho")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    parser.add_argument("--motor", default="recozimento", choices=daniel_birds.MOTORES)
+    parser.add_argument("--iteracoes", type=int, default=ITERACOES_VAZAO, help="iterações na medida de vazão")
+    parser.add_argument("--sementes", type=int, nargs="+", default=SEMENTES)
+    parser.add_argument("--semente-base", type=int, default=0, help="semente das bases sintéticas")
+    parser.add_argument("--saida", help="arquivo JSON com os resultados (padrão: tela)")
+    parser.add_argument("--comparar", help="relatório JSON de uma execução anterior")
+    args = parser.parse_args(argv)
+
+    relatorio = {
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": versao_do_codigo(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "parametros": {k: v for k, v in vars(args).items() if k not in ("saida", "comparar")},
+        "escalas": [],
+    }
+    with tempfile.TemporaryDirectory() as pasta:
+        for n_aves in args.escalas:
+            medida = medir_escala(pasta, n_aves, args)
+            relatorio["escalas"].append(medida)
+            mediana = medida["tempo_ate_tolerancia_mediana_s"]
+            print(f"{n_aves:>7} aves | carga {medida['carga_s']:.2f}s (cache {medida['carga_cache_s']:.2f}s) | "
+                  f"início {medida['inicializacao_s']:.2f}s | {medida['iteracoes_por_s']:,.0f} it/s | "
+                  f"tolerância {medida['sucessos']}/{medida['execucoes']}"
+                  + (f" em {mediana:.2f}s" if mediana is not None else ""), file=sys.stderr)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(json.load(f), relatorio)
+
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+
+if __name__ == "__main__":
+    main()
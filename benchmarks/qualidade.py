@@ -0,0 +1,180 @@
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import daniel_birds
+from daniel_birds import carregar_dataset, proporcoes_alvo, solve, verificar_resultado_final
+from escala import versao_do_codigo
+from sintetico import gerar_csv
+
+# ==== CENÁRIOS DE REFERÊNCIA (não mudar sem regravar a base) ====
+BASES = {"pequena": (170, 0), "media": (1000, 0)}  # nome: (aves, semente da base sintética)
+ALVOS = {"TAMANHO E COR": 28, "TIPO DE NINHO": 25, "2 PONTOS": 20, "GEOGRAFIA": 35, "HABITATS": 45}
+ALVOS_EXTREMOS = {"TAMANHO E COR": 40, "TIPO DE NINHO": 15, "2 PONTOS": 30, "GEOGRAFIA": 50, "HABITATS": 60}
+CENARIOS = [
+    {"nome": "base", "base": "pequena", "proporcoes": ALVOS, "tolerancia": 2, "total_aves": 60},
+    {"nome": "apertado", "base": "pequena", "proporcoes": ALVOS, "tolerancia": 1, "total_aves": 60, "obrigatorias": [0, 1, 2]},
+    {"nome": "extremos", "base": "pequena", "proporcoes": ALVOS_EXTREMOS, "tolerancia": 3, "total_aves": 40, "obrigatorias": [5]},
+    {"nome": "grande", "base": "media", "proporcoes": ALVOS, "tolerancia": 0.5, "total_aves": 200},
+    {"nome": "curto", "base": "media", "proporcoes": ALVOS_EXTREMOS, "tolerancia": 3, "total_aves": 30},
+]
+# Motores e variações de configuração ("ajustes" troca constantes do daniel_birds só durante a execução).
+# A busca exata não sorteia nada e o orçamento dela é em nós: uma execução só, com um limite de nós próprio.
+CONFIGURACOES = {
+    "recozimento": {"motor": "recozimento"},
+    "recozimento_uniforme": {"motor": "recozimento", "ajustes": {"SA_PROPOSTA_GUIADA": 0.0, "SA_POLIMENTO": False}},
+    "recozimento_lote": {"motor": "recozimento", "ajustes": {"SA_LOTE": 16}},
+    "replicas": {"motor": "replicas"},
+    "tabu": {"motor": "tabu"},
+    "exato": {"motor": "exato", "orcamento": 20000, "sementes": [None]},
+}
+SEMENTES = [1, 2, 3, 4, 5]
+ORCAMENTO = 200000  # iterações por execução, para o benchmark não depender do relógio
+PROVAS = ("otimo", "inviavel")  # status da busca exata que afirmam algo sobre todos os baralhos possíveis
+
+# ==== LIMITES PARA ACUSAR REGRESSÃO (em relação à base gravada) ====
+QUEDA_SUCESSO = 0.2  # taxa de sucesso pode cair até isso (1 de 5 sementes)
+ALTA_ENERGIA = 0.25  # energia média pode subir até 25%...
+ALTA_ENERGIA_MINIMA = 0.5  # ...ou até esse valor absoluto, o que for maior
+ALTA_ITERACOES = 0.5  # mediana de iterações até o sucesso pode subir até 50%
+
+BASE_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "base_qualidade.json")
+
+def rodar_configuracao(datasets, cenario, configuracao):
+    dataset = datasets[cenario["base"]]
+    proporcoes_alvo_caracteristica = proporcoes_alvo(cenario["proporcoes"])
+    originais = {nome: getattr(daniel_birds, nome) for nome in configuracao.get("ajustes", {})}
+    for nome, valor in configuracao.get("ajustes", {}).items():
+        setattr(daniel_birds, nome, valor)
+    execucoes = []
+    try:
+        for semente in configuracao.get("sementes", SEMENTES):
+            resultado = solve(dataset, cenario["proporcoes"], cenario["tolerancia"], cenario["total_aves"],
+                              cenario.get("obrigatorias", []), seed=semente, budget=configuracao.get("orcamento", ORCAMENTO),
+                              motor=configuracao["motor"])
+            # Conferência independente do motor: o baralho tem que passar na verificação completa
+            sucesso = bool(resultado.baralho) and verificar_resultado_final(
+                dataset, resultado.baralho, proporcoes_alvo_caracteristica, cenario["tolerancia"])
+            execucoes.append((sucesso, resultado.energia, resultado.iteracoes, resultado.segundos, resultado.status))
+    finally:
+        for nome, valor in originais.items():
+            setattr(daniel_birds, nome, valor)
+
+    energias = [e for _, e, _, _, _ in execucoes if math.isfinite(e)]
+    ate_sucesso = [it for ok, _, it, _, _ in execucoes if ok]
+    energias_sucesso = [e for ok, e, _, _, _ in execucoes if ok]
+    return {
+        "taxa_sucesso": len(ate_sucesso) / len(execucoes),
+        "energia_media": statistics.mean(energias) if energias else None,
+        "energia_minima_sucesso": min(energias_sucesso) if energias_sucesso else None,
+        "iteracoes_ate_sucesso": statistics.median(ate_sucesso) if ate_sucesso else None,
+        "segundos": sum(s for _, _, _, s, _ in execucoes),
+        "status": execucoes[0][4],  # só a busca exata preenche (e ela dá sempre o mesmo)
+    }
+
+def regressoes(base, atual):
+    # Lista de textos, um por medida que piorou além do limite
+    achadas = []
+    for chave, medida in atual.items():
+        antes = base.get(chave)
+        if antes is None:
+            continue
+        if medida["taxa_sucesso"] < antes["taxa_sucesso"] - QUEDA_SUCESSO - 1e-9:
+            achadas.append(f"{chave}: sucesso {antes['taxa_sucesso']:.0%} -> {medida['taxa_sucesso']:.0%}")
+        if antes["energia_media"] is not None:
+            limite = antes["energia_media"] + max(ALTA_ENERGIA * antes["energia_media"], ALTA_ENERGIA_MINIMA)
+            if medida["energia_media"] is None or medida["energia_media"] > limite:
+                achadas.append(f"{chave}: energia média {antes['energia_media']:.3f} -> {medida['energia_media']}")
+        if antes["iteracoes_ate_sucesso"] and medida["iteracoes_ate_sucesso"]:
+            if medida["iteracoes_ate_sucesso"] > antes["iteracoes_ate_sucesso"] * (1 + ALTA_ITERACOES):
+                achadas.append(f"{chave}: iterações até o sucesso {antes['iteracoes_ate_sucesso']:.0f} -> "
+                               f"{medida['iteracoes_ate_sucesso']:.0f}")
+        if antes.get("status") in PROVAS and medida["status"] != antes["status"]:
+            achadas.append(f"{chave}: status {antes['status']} -> {medida['status']}")
+    return achadas
+
+def contradicoes(medidas):
+    # A prova da busca exata tem que valer contra os outros motores no mesmo cenário, com ou sem base gravada
+    achadas = []
+    for chave, medida in medidas.items():
+        if medida["status"] not in PROVAS:
+            continue
+        cenario = chave.split("/")[0]
+        for outra, outra_medida in medidas.items():
+            if outra == chave or outra.split("/")[0] != cenario or outra_medida["energia_minima_sucesso"] is None:
+                continue
+            if medida["status"] == "inviavel":
+                achadas.append(f"{chave}: inviável, mas {outra} achou baralho dentro da tolerância")
+            elif outra_medida["energia_minima_sucesso"] < medida["energia_minima_sucesso"] - 1e-9:
+                achadas.append(f"{chave}: ótimo com energia {medida['energia_minima_sucesso']:.3f}, mas {outra} achou "
+                               f"{outra_medida['energia_minima_sucesso']:.3f}")
+    return achadas
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de qualidade: cenários fixos, sementes fixas e comparação com a base")
+    parser.add_argument("--base", default=BASE_PADRAO, help="arquivo da base gravada")
+    parser.add_argument("--gravar-base", action="store_true", help="grava os resultados desta execução como a nova base")
+    parser.add_argument("--configuracoes", nargs="+", choices=list(CONFIGURACOES), default=list(CONFIGURACOES))
+    parser.add_argument("--saida", help="arquivo JSON com os resultados desta execução")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        datasets = {
+            nome: carregar_dataset(gerar_csv(os.path.join(pasta, f"{nome}.csv"), n_aves, semente), usar_cache=False)
+            for nome, (n_aves, semente) in BASES.items()
+        }
+
+    medidas = {}
+    for cenario in CENARIOS:
+        for nome in args.configuracoes:
+            medida = rodar_configuracao(datasets, cenario, CONFIGURACOES[nome])
+            medidas[f"{cenario['nome']}/{nome}"] = medida
+            energia = "-" if medida["energia_media"] is None else f"{medida['energia_media']:.3f}"
+            iteracoes = "-" if medida["iteracoes_ate_sucesso"] is None else f"{medida['iteracoes_ate_sucesso']:.0f}"
+            status = f" | {medida['status']}" if medida["status"] else ""
+            print(f"{cenario['nome']:>10} {nome:<22} sucesso {medida['taxa_sucesso']:>4.0%} | energia {energia:>8} | "
+                  f"iterações {iteracoes:>7} | {medida['segundos']:.1f}s{status}", file=sys.stderr)
+
+    relatorio = {
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": versao_do_codigo(),
+        "sementes": SEMENTES,
+        "orcamento": ORCAMENTO,
+        "medidas": medidas,
+    }
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    erradas = contradicoes(medidas)
+    for texto in erradas:
+        print(f"❌ {texto}", file=sys.stderr)
+    if erradas:
+        return 1  # nem compara nem grava base: algum motor está afirmando algo falso
+    if args.gravar_base:
+        with open(args.base, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"Base gravada em {args.base}", file=sys.stderr)
+        return 0
+
+    if not os.path.exists(args.base):
+        print(f"Sem base em {args.base} (rode com --gravar-base)", file=sys.stderr)
+        return 0
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    achadas = regressoes(base["medidas"], medidas)
+    for texto in achadas:
+        print(f"❌ {texto}", file=sys.stderr)
+    if not achadas:
+        print(f"✅ Nenhuma regressão em relação à base ({base.get('commit') or '?'})", file=sys.stderr)
+    return 1 if achadas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import argparse
+import csv
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from daniel_birds import CARACTERISTICAS_INDIVIDUAIS, GRUPOS
+
+# ==== BASES SINTÉTICAS (mesmo formato do CSV do Wingspan) ====
+# Chance de uma ave ter X em cada coluna, parecida com a das cartas de verdade:
+# habitats e geografia são comuns, as características individuais são raras.
+DENSIDADES = {
+    5: 0.45, 6: 0.45, 7: 0.45,  # habitats
+    8: 0.10, 9: 0.08, 10: 0.05,
+    11: 0.30, 12: 0.30, 13: 0.25,  # tamanho e cor
+    14: 0.25, 15: 0.25, 16: 0.25, 17: 0.20,  # tipo de ninho
+    18: 0.05,
+    19: 0.20, 20: 0.20, 21: 0.20, 22: 0.15,  # 2 pontos
+    23: 0.30, 24: 0.40,  # geografia
+    25: 0.05, 26: 0.05, 27: 0.08, 28: 0.05, 29: 0.06, 30: 0.04,
+}
+DENSIDADE_PADRAO = 0.2  # colunas do GRUPOS/CARACTERISTICAS_INDIVIDUAIS que não estão na tabela acima
+
+def gerar_csv(caminho, n_aves, semente=0, densidade=1.0):
+    """Escreve um CSV com `n_aves` aves sorteadas; `densidade` multiplica a chance de X de todas as colunas."""
+    rng = random.Random(semente)
+    usadas = sorted({col for ids in GRUPOS.values() for col in ids} | set(CARACTERISTICAS_INDIVIDUAIS))
+    ultima = max(usadas)
+    chances = [min(1.0, DENSIDADES.get(col, DENSIDADE_PADRAO) * densidade) if col in usadas else 0.0
+               for col in range(2, ultima + 1)]
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Common name"] + [f"Coluna {col}" for col in range(2, ultima + 1)])
+        for i in range(n_aves):
+            writer.writerow([f"Ave sintética {i:06d}"] + ["X" if rng.random() < p else "" for p in chances])
+    return caminho
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera um CSV sintético de aves no formato do Wingspan")
+    parser.add_argument("aves", type=int, help="número de aves (linhas)")
+    parser.add_argument("saida", help="arquivo CSV a criar")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--densidade", type=float, default=1.0, help="multiplica a chance de X de cada coluna")
+    args = parser.parse_args(argv)
+    gerar_csv(args.saida, args.aves, args.semente, args.densidade)
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,18 @@
+import argparse
 import csv
-import random
+import json
 import math
+import os
 import sys
+import time
 
-# ==== CONFIGURAÇÕES DE GRUPOS (mesma lógica original) ====
-GRUPOS = {
-    "TAMANHO E COR": [11, 12, 13],
-    "TIPO DE NINHO": [14, 15, 16, 17],
-    "2 PONTOS": [19, 20, 21, 22],
-    "GEOGRAFIA": [23, 24],
-    "HABITATS": [5, 6, 7]
-}
+from daniel_birds import (GRUPOS, Rastro, carregar_dataset, contar_proporcao, ids_de, ler_salvamento, linhas_originais,
+                          proporcoes_alvo, retomar, solve)
 
-# ==== CARACTERÍSTICAS INDIVIDUAIS (fora dos grupos) ====
-CARACTERISTICAS_INDIVIDUAIS = [8, 9, 10, 18, 25, 26, 27, 28, 29, 30]
-
-# ==== CONFIGURAÇÃO SIMULATED ANNEALING ====
-SA_ITERATIONS = 50000
-SA_T_INITIAL = 1.0
-SA_T_COOLING_RATE = 0.9999
+try:
+    import tomllib  # Python 3.11+
+except ImportError:
+    tomllib = None
 
 def normalizar_caminho(caminho):
     caminho = caminho.strip()
@@ -33,31 +27,6 @@ def normalizar_caminho(caminho):
     return caminho
 
 
-def carregar_csv(caminho_csv):
-    with open(caminho_csv, newline='', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        dados = list(reader)
-    header = dados[0]
-    linhas = dados[1:]
-    return header, linhas
-
-def contar_proporcao(linhas, col_id):
-    total = len(linhas)
-    if total == 0:
-        return 0.0
-    com_x = sum(1 for linha in linhas if linha[col_id - 1].strip().upper() == "X")
-    return (com_x / total) * 100
-
-def contar_proporcao_grupo(linhas, col_ids):
-    total = len(linhas)
-    if total == 0:
-        return 0.0
-    com_x = 0
-    for linha in linhas:
-        if any(linha[col - 1].strip().upper() == "X" for col in col_ids):
-            com_x += 1
-    return (com_x / total) * 100
-
 def solicitar_proporcoes_alvo_grupos():
     proporcoes_grupos_input = {}
     print("\n--- Definição de PROPORÇÃO ALVO (%) por Grupo ---")
@@ -98,91 +67,35 @@ def perguntar_modo_saida():
             return modo
         print("⚠️ Opção inválida.")
 
-def calcular_energia(baralho, proporcoes_alvo_caracteristica, total_aves):
-    if len(baralho) != total_aves:
-        return float('inf')
-    energia = 0.0
-    for col_id, desejada in proporcoes_alvo_caracteristica.items():
-        prop_obtida = contar_proporcao(baralho, col_id)
-        energia += abs(prop_obtida - desejada)
-    for col_id in CARACTERISTICAS_INDIVIDUAIS:
-        if contar_proporcao(baralho, col_id) <= 0.0:
-            return float('inf')
-    return energia
-
-def inicializar_baralho(linhas, total_aves, proporcoes_alvo_caracteristica, must_include):
-    baralho_set = set(tuple(l) for l in must_include)
-    for col_id in CARACTERISTICAS_INDIVIDUAIS:
-        candidatos = [linha for linha in linhas if linha[col_id - 1].strip().upper() == "X" and tuple(linha) not in baralho_set]
-        if candidatos:
-            baralho_set.add(tuple(random.choice(candidatos)))
-    linhas_restantes = [linha for linha in linhas if tuple(linha) not in baralho_set]
-    aves_faltando = total_aves - len(baralho_set)
-    proporcoes_ordenadas = sorted(proporcoes_alvo_caracteristica.items(), key=lambda x: x[1], reverse=True)
-    adicoes, idx = 0, 0
-    while adicoes < aves_faltando and linhas_restantes:
-        col_prioritaria = proporcoes_ordenadas[idx % len(proporcoes_ordenadas)][0]
-        candidatos = [l for l in linhas_restantes if l[col_prioritaria - 1].strip().upper() == "X"]
-        escolhido = random.choice(candidatos if candidatos else linhas_restantes)
-        baralho_set.add(tuple(escolhido))
-        linhas_restantes.remove(escolhido)
-        adicoes += 1
-        idx += 1
-    baralho = [list(x) for x in baralho_set]
-    random.shuffle(baralho)
-    return baralho if len(baralho) == total_aves else None
-
-def gerar_vizinho(baralho, todas_linhas_tuple, must_include_set):
-    baralho_tuple = {tuple(l) for l in baralho}
-    aves_incluidas = [l for l in baralho_tuple if l not in must_include_set]
-    aves_nao = [l for l in todas_linhas_tuple if l not in baralho_tuple and l not in must_include_set]
-    if not aves_incluidas or not aves_nao:
-        return None
-    removida = random.choice(aves_incluidas)
-    adicionada = random.choice(aves_nao)
-    novo = list((baralho_tuple - {removida}) | {adicionada} | must_include_set)
-    return [list(l) for l in novo]
-
-def verificar_resultado_final(baralho_final, proporcoes_alvo_caracteristica, tolerancia):
-    for ids in GRUPOS.values():
-        for col_id in ids:
-            desejada = proporcoes_alvo_caracteristica.get(col_id, 0.0)
-            if abs(contar_proporcao(baralho_final, col_id) - desejada) > tolerancia:
-                return False
-    for col_id in CARACTERISTICAS_INDIVIDUAIS:
-        if contar_proporcao(baralho_final, col_id) <= 0.0:
-            return False
-    return True
-
-def exibir_resultados_sa(baralho_final, linhas_totais, proporcoes_grupos_input, proporcoes_alvo_caracteristica, tolerancia, modo_saida, must_include):
+def exibir_resultados_sa(dataset, baralho_final, proporcoes_grupos_input, proporcoes_alvo_caracteristica, tolerancia, modo_saida, must_include):
     print(f"\n✅ Baralho final gerado com {len(baralho_final)} aves!")
-    bar_set = {tuple(l) for l in baralho_final}
-    must_set = {tuple(l) for l in must_include}
+    bar_set = set(baralho_final)
+    must_set = set(must_include)
 
     if modo_saida == "1":
         print("\n🕊️ Pássaros incluídos:")
-        for l in baralho_final:
-            print(f" - {l[0]}")
+        for i in baralho_final:
+            print(f" - {dataset.nomes[i]}")
     elif modo_saida == "2":
         print("\n🪶 Pássaros adicionados além dos obrigatórios:")
-        for l in baralho_final:
-            if tuple(l) not in must_set:
-                print(f" - {l[0]}")
+        for i in baralho_final:
+            if i not in must_set:
+                print(f" - {dataset.nomes[i]}")
     elif modo_saida == "3":
         print("\n🚫 Pássaros RETIRADOS do arquivo original:")
-        removidos = [l for l in linhas_totais if tuple(l) not in bar_set]
-        for l in removidos:
-            print(f" - {l[0]}")
+        removidos = [i for i in range(len(dataset)) if i not in bar_set]
+        for i in removidos:
+            print(f" - {dataset.nomes[i]}")
 
     print("\n--- RESULTADOS DE PROPORÇÕES ---")
     for nome, ids in GRUPOS.items():
         #alvo = proporcoes_grupos_input.get(nome, 0.0)
-        #obtido = contar_proporcao_grupo(baralho_final, ids)
+        #obtido = contar_proporcao_grupo(dataset, baralho_final, ids)
         #status = "✅ OK" if abs(obtido - alvo) <= tolerancia else "❌ FORA"
         print(f"\nGRUPO '{nome.upper()}'")
         for col in ids:
             dese = proporcoes_alvo_caracteristica[col]
-            ob = contar_proporcao(baralho_final, col)
+            ob = contar_proporcao(dataset, baralho_final, col)
             st = "✅ OK" if abs(ob - dese) <= tolerancia else "❌ FORA"
             print(f" - feature {col}: {ob:.1f}% (alvo {dese:.1f}%) {st}")
 
@@ -193,71 +106,320 @@ def exportar_baralho_csv(header, baralho, nome_arquivo="baralho_final.csv"):
         writer.writerows(baralho)
     print(f"\n💾 Arquivo '{nome_arquivo}' gerado com sucesso!")
 
-def gerar_baralho(header, linhas, must_include_input, total_aves):
-    tolerancia = solicitar_tolerancia()
-    modo_saida = perguntar_modo_saida()
-    proporcoes_grupos_input = solicitar_proporcoes_alvo_grupos()
-
-    proporcoes_alvo_caracteristica = {
-        col: proporcoes_grupos_input[nome]
-        for nome, ids in GRUPOS.items()
-        for col in ids
+def exibir_trocas(resultado):
+    detalhes = resultado.detalhes
+    print(f"\n--- TROCA DE RÉPLICAS ({detalhes['rodadas']} rodadas) ---")
+    for T, taxa in zip(detalhes["temperaturas"], detalhes["aceitacao_movimentos"]):
+        print(f" - T={T:g}: {taxa:.1%} dos movimentos aceitos")
+    for t in detalhes["trocas"]:
+        print(f" - troca T={t['t_fria']:g} <-> T={t['t_quente']:g}: {t['aceitas']}/{t['tentativas']} ({t['taxa']:.1%})")
+
+def exibir_busca_exata(resultado):
+    mensagens = {
+        "otimo": "🔒 Busca completa: o baralho abaixo tem a menor energia possível dentro da tolerância.",
+        "viavel": "⏱️ Tempo esgotado: existe baralho dentro da tolerância, mas não foi provado que é o de menor energia.",
+        "inviavel": "🔒 Busca completa: NÃO existe baralho que respeite essa tolerância.",
+        "desconhecido": "⏱️ Tempo esgotado antes de encontrar ou descartar um baralho dentro da tolerância.",
     }
+    print(f"\n{mensagens[resultado.status]}")
+    print(f"   ({resultado.detalhes['nos']} nós em {resultado.segundos:.1f}s)")
+
+def exibir_tabu(resultado):
+    detalhes = resultado.detalhes
+    print(f"\n--- BUSCA TABU ({resultado.iteracoes} iterações) ---")
+    print(f" - {detalhes['avaliacoes']} trocas avaliadas, {detalhes['aspiracoes']} feitas por aspiração")
+
+def exibir_cadeias(resultados):
+    print("\n--- CADEIAS ---")
+    for k, r in enumerate(resultados, 1):
+        if r is None:
+            print(f" - cadeia {k}: não foi possível inicializar")
+            continue
+        st = "✅" if r["sucesso"] else "❌"
+        print(f" - cadeia {k} (semente {r['semente']}): energia {r['energia']:.2f}, {r['iteracoes']} iterações {st}")
+
+def exibir_propostas(detalhes):
+    guiadas = detalhes["propostas_guiadas"]
+    uniformes = detalhes["avaliacoes"] - guiadas
+    print("\n--- PROPOSTAS DE TROCA ---")
+    print(f" - guiadas pelas metas: {detalhes['aceitas_guiadas']}/{guiadas} aceitas")
+    print(f" - sorteio uniforme: {detalhes['aceitas_uniformes']}/{uniformes} aceitas")
+
+def exibir_rastro(rastro):
+    print("\n--- RASTRO ---")
+    for fase, segundos in rastro.fases.items():
+        print(f" - {fase}: {segundos:.3f}s")
+    total = rastro.aceitas + rastro.rejeitadas
+    if total:
+        print(f" - trocas aceitas: {rastro.aceitas}/{total} ({rastro.aceitas / total:.1%})")
+    if rastro.melhoras:
+        print(f" - {len(rastro.melhoras)} melhoras do melhor baralho, a última na iteração {rastro.melhoras[-1][0]}")
+
+def perguntar_rastro():
+    return input("Gravar o rastro da execução (tempos, energia e temperatura)? "
+                 "Nome do arquivo .csv ou .json (ENTER = não gravar): ").strip()
+
+def perguntar_semente():
+    while True:
+        resposta = input("Semente para poder repetir esta execução (ENTER = sorteada): ").strip()
+        if not resposta:
+            return None
+        try:
+            return int(resposta)
+        except ValueError:
+            print("⚠️ Entrada inválida.")
 
-    nomes_must = [m.strip().lower() for m in must_include_input if m.strip()]
-    must_include = [l for l in linhas if l[0].strip().lower() in nomes_must]
-    must_set = {tuple(l) for l in must_include}
-
-    if len(must_include) > total_aves:
-        print("❌ A lista obrigatória contém mais aves do que o limite.")
-        return
-
-    todas_tuple = [tuple(l) for l in linhas]
-
-    bar_atual = inicializar_baralho(linhas, total_aves, proporcoes_alvo_caracteristica, must_include)
-    if bar_atual is None:
-        print("❌ Não foi possível inicializar o baralho.")
-        return
-
-    energia_atual = calcular_energia(bar_atual, proporcoes_alvo_caracteristica, total_aves)
-    melhor = list(bar_atual)
-    melhor_e = energia_atual
-    T = SA_T_INITIAL
+def perguntar_salvamento():
+    return input("Arquivo para salvar o progresso e poder retomar depois (ENTER = não salvar): ").strip()
 
-    for i in range(SA_ITERATIONS):
-        vz = gerar_vizinho(bar_atual, todas_tuple, must_set)
-        if vz is None:
-            continue
-        e_vz = calcular_energia(vz, proporcoes_alvo_caracteristica, total_aves)
+def perguntar_cadeias():
+    while True:
+        resposta = input(f"\nQuantas cadeias em paralelo? (ENTER = 1, máximo útil = {os.cpu_count()}): ").strip()
+        if not resposta:
+            return 1
+        try:
+            n = int(resposta)
+            if n >= 1:
+                return n
+        except ValueError:
+            pass
+        print("⚠️ Entrada inválida.")
 
-        if e_vz < energia_atual or random.random() < math.exp(-(e_vz - energia_atual) / T):
-            bar_atual = vz
-            energia_atual = e_vz
+OPCOES_MOTOR = {"1": "recozimento", "2": "replicas", "3": "exato", "4": "tabu"}
 
-        if energia_atual < melhor_e:
-            melhor, melhor_e = list(bar_atual), energia_atual
-            if verificar_resultado_final(melhor, proporcoes_alvo_caracteristica, tolerancia):
-                print(f"\n🎉 Baralho ideal encontrado após {i+1} iterações.")
-                exibir_resultados_sa(melhor, linhas, proporcoes_grupos_input, proporcoes_alvo_caracteristica, tolerancia, modo_saida, must_include)
-                break
+def perguntar_motor():
+    while True:
+        motor = input(
+            "\nQual motor de busca usar?\n"
+            "1. Recozimento simulado\n"
+            "2. Troca de réplicas (parallel tempering)\n"
+            "3. Busca exata (prova se existe baralho dentro da tolerância)\n"
+            "4. Busca tabu\n"
+            "Escolha 1, 2, 3 ou 4 (ENTER = 1): "
+        ).strip() or "1"
+        if motor in OPCOES_MOTOR:
+            return OPCOES_MOTOR[motor]
+        print("⚠️ Opção inválida.")
 
-        T *= SA_T_COOLING_RATE
+def gerar_baralho(dataset, must_include_input, total_aves, segundos_carga=None):
+    tolerancia = solicitar_tolerancia()
+    modo_saida = perguntar_modo_saida()
+    proporcoes_grupos_input = solicitar_proporcoes_alvo_grupos()
+    motor = perguntar_motor()
+    n_cadeias = perguntar_cadeias() if motor == "recozimento" else 1
+    semente = perguntar_semente()
+    rastro, arquivo_rastro, arquivo_salvamento = None, None, None
+    if motor == "recozimento" and n_cadeias == 1:
+        arquivo_rastro = perguntar_rastro()
+        if arquivo_rastro:
+            rastro = Rastro()
+            if segundos_carga is not None:
+                rastro.somar("carga", segundos_carga)
+        arquivo_salvamento = perguntar_salvamento() or None
+
+    def ao_melhorar(baralho, energia, segundos):
+        print(f"   ... baralho dentro da tolerância com energia {energia:.2f} ({segundos:.1f}s)")
+
+    inicio = time.time()
+    try:
+        resultado = solve(dataset, proporcoes_grupos_input, tolerancia, total_aves, must_include_input, seed=semente,
+                          motor=motor, cadeias=n_cadeias, ao_melhorar=ao_melhorar if motor == "exato" else None,
+                          rastro=rastro, salvar_em=arquivo_salvamento)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    except KeyboardInterrupt:
+        if arquivo_salvamento is None:
+            raise
+        # Um arquivo de antes desta execução (mesmo nome) não serve para continuá-la
+        if not os.path.exists(arquivo_salvamento) or os.path.getmtime(arquivo_salvamento) < inicio:
+            print("\n⏸️ Interrompido antes do primeiro salvamento; não há de onde continuar.")
+            return
+        print(f"\n⏸️ Interrompido. Para continuar do último salvamento: python \"daniel project 4.py\" retomar {arquivo_salvamento}")
+        return
+    print(f"\n🎲 Semente: {resultado.semente}")
+
+    if motor == "exato":
+        exibir_busca_exata(resultado)
+        if not resultado.sucesso:
+            return
+    elif motor == "replicas":
+        exibir_trocas(resultado)
+    elif motor == "tabu":
+        exibir_tabu(resultado)
+    else:
+        if "cadeias" in resultado.detalhes:
+            exibir_cadeias(resultado.detalhes["cadeias"])
+        if resultado.detalhes.get("propostas_guiadas"):
+            exibir_propostas(resultado.detalhes)
+        if rastro is not None:
+            exibir_rastro(rastro)
+            rastro.exportar(arquivo_rastro)
+            print(f"📄 Rastro gravado em {arquivo_rastro}")
+
+    melhor = resultado.baralho
+    if motor == "exato":
+        print("\n🎉 Baralho ideal encontrado pela busca exata.")
+    elif resultado.sucesso:
+        print(f"\n🎉 Baralho ideal encontrado após {resultado.iteracoes} iterações.")
     else:
         print("\n⚠️ Nenhum baralho perfeito foi encontrado.")
-        exibir_resultados_sa(melhor, linhas, proporcoes_grupos_input, proporcoes_alvo_caracteristica, tolerancia, modo_saida, must_include)
+    proporcoes_alvo_caracteristica = proporcoes_alvo(proporcoes_grupos_input)
+    must_include = ids_de(dataset, must_include_input)
+    exibir_resultados_sa(dataset, melhor, proporcoes_grupos_input, proporcoes_alvo_caracteristica, tolerancia, modo_saida, must_include)
 
     if input("\nDeseja exportar o baralho final em CSV? (s/n): ").strip().lower() == "s":
         nome = input("Digite o nome (ENTER = baralho_final.csv): ").strip() or "baralho_final.csv"
-        exportar_baralho_csv(header, melhor, nome)
+        exportar_baralho_csv(dataset.header, linhas_originais(dataset, melhor), nome)
+
+# ==== MODO LOTE (cenários em arquivo, sem perguntas) ====
+CAMPOS_LOTE = ["nome", "motor", "sucesso", "status", "energia", "iteracoes", "segundos", "semente",
+               "total_aves", "tolerancia", "aves", "erro"]
+
+def carregar_cenarios(caminho):
+    # Aceita JSON ou TOML: uma lista de cenários ou {"csv": ..., "padrao": {...}, "cenarios": [...]}
+    if caminho.lower().endswith(".toml"):
+        if tomllib is None:
+            raise ValueError("arquivos TOML precisam do Python 3.11+ (ou use JSON)")
+        with open(caminho, "rb") as f:
+            dados = tomllib.load(f)
+    else:
+        with open(caminho, encoding="utf-8") as f:
+            dados = json.load(f)
+    if isinstance(dados, list):
+        dados = {"cenarios": dados}
+    padrao = dados.get("padrao", {})
+    cenarios = []
+    for k, cenario in enumerate(dados.get("cenarios", []), 1):
+        completo = dict(padrao)
+        completo.update(cenario)
+        completo.setdefault("nome", f"cenario_{k}")
+        cenarios.append(completo)
+    return dados.get("csv"), cenarios
+
+def resolver_cenario(dataset, cenario):
+    rastro = Rastro(cenario.get("rastro_intervalo")) if cenario.get("rastro") else None
+    resultado = solve(
+        dataset,
+        cenario["proporcoes"],
+        float(cenario["tolerancia"]),
+        int(cenario["total_aves"]),
+        cenario.get("obrigatorias", []),
+        seed=cenario.get("semente"),
+        budget=cenario.get("orcamento"),
+        motor=cenario.get("motor", "recozimento"),
+        cadeias=int(cenario.get("cadeias", 1)),
+        prazo_ms=cenario.get("prazo_ms"),
+        energia_alvo=cenario.get("energia_alvo"),
+        rastro=rastro,
+        salvar_em=cenario.get("salvamento"),
+    )
+    if rastro is not None:
+        rastro.exportar(cenario["rastro"])
+    return registro_do_resultado(dataset, resultado, cenario["nome"], int(cenario["total_aves"]), float(cenario["tolerancia"]))
+
+def registro_do_resultado(dataset, resultado, nome, total_aves, tolerancia):
+    registro = {
+        "nome": nome,
+        "motor": resultado.motor,
+        "sucesso": resultado.sucesso,
+        "status": resultado.status,
+        "energia": resultado.energia if math.isfinite(resultado.energia) else None,
+        "iteracoes": resultado.iteracoes,
+        "segundos": round(resultado.segundos, 4),
+        "semente": resultado.semente,
+        "total_aves": total_aves,
+        "tolerancia": tolerancia,
+        "aves": [dataset.nomes[i] for i in resultado.baralho],
+    }
+    for ids in GRUPOS.values():
+        for col in ids:
+            registro[f"feature_{col}"] = round(resultado.proporcoes[col], 4)
+    return registro
+
+def rodar_lote(caminho_cenarios, caminho_csv=None, caminho_saida=None):
+    csv_do_arquivo, cenarios = carregar_cenarios(caminho_cenarios)
+    caminho_csv = caminho_csv or csv_do_arquivo
+    if not caminho_csv:
+        raise ValueError("informe o CSV das aves (--csv ou chave \"csv\" no arquivo de cenários)")
+    if not os.path.isabs(caminho_csv) and caminho_csv == csv_do_arquivo:
+        caminho_csv = os.path.join(os.path.dirname(os.path.abspath(caminho_cenarios)), caminho_csv)
+    dataset = carregar_dataset(normalizar_caminho(caminho_csv))
+
+    como_csv = caminho_saida is not None and caminho_saida.lower().endswith(".csv")
+    saida = open(caminho_saida, "w", newline="", encoding="utf-8") if caminho_saida else sys.stdout
+    try:
+        writer = None
+        if como_csv:
+            colunas_features = [f"feature_{col}" for ids in GRUPOS.values() for col in ids]
+            writer = csv.DictWriter(saida, fieldnames=CAMPOS_LOTE + colunas_features, extrasaction="ignore")
+            writer.writeheader()
+        for cenario in cenarios:
+            try:
+                registro = resolver_cenario(dataset, cenario)
+            except (KeyError, TypeError, ValueError) as e:
+                registro = {"nome": cenario.get("nome"), "sucesso": False, "erro": str(e)}
+            if writer is not None:
+                registro = dict(registro, aves="; ".join(registro.get("aves", [])))
+                writer.writerow(registro)
+            else:
+                saida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            saida.flush()
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+
+def main_lote(argv):
+    parser = argparse.ArgumentParser(
+        prog="daniel project 4.py lote",
+        description="Resolve vários cenários de baralho sem perguntas e grava um resultado por cenário.",
+    )
+    parser.add_argument("cenarios", help="arquivo JSON ou TOML com os cenários")
+    parser.add_argument("--csv", help="CSV com todas as aves (sobrepõe a chave \"csv\" do arquivo)")
+    parser.add_argument("--saida", help="arquivo .jsonl ou .csv (padrão: JSON Lines na tela)")
+    args = parser.parse_args(argv)
+    rodar_lote(args.cenarios, args.csv, args.saida)
+
+def main_retomar(argv):
+    parser = argparse.ArgumentParser(
+        prog="daniel project 4.py retomar",
+        description="Continua um recozimento interrompido a partir do arquivo de salvamento.",
+    )
+    parser.add_argument("salvamento", help="arquivo gravado durante a execução")
+    parser.add_argument("--csv", help="CSV com todas as aves (padrão: o mesmo da execução salva)")
+    args = parser.parse_args(argv)
+    try:
+        meta, _ = ler_salvamento(args.salvamento)
+        dataset = carregar_dataset(normalizar_caminho(args.csv) if args.csv else meta["csv"])
+        resultado = retomar(dataset, args.salvamento)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print(f"⏸️ Interrompido de novo; o progresso continua em {args.salvamento}", file=sys.stderr)
+        sys.exit(1)
+    parametros = meta["parametros"]
+    registro = registro_do_resultado(dataset, resultado, os.path.basename(args.salvamento), parametros["total_aves"],
+                                     parametros["tolerancia"])
+    print(json.dumps(registro, ensure_ascii=False))
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "lote":
+        main_lote(sys.argv[2:])
+        sys.exit()
+    if len(sys.argv) > 1 and sys.argv[1] == "retomar":
+        main_retomar(sys.argv[2:])
+        sys.exit()
+
     while True:
         print("\n===== 🕊️ BEM-VINDO AO PROJETO DANIEL BIRDS (com grupos) =====")
         caminho_raw = input("\nDigite o caminho completo do arquivo CSV com todas as aves: ").strip()
         caminho = normalizar_caminho(caminho_raw)
 
         try:
-            header, linhas = carregar_csv(caminho)
+            inicio = time.perf_counter()
+            dataset = carregar_dataset(caminho)
+            segundos_carga = time.perf_counter() - inicio
         except FileNotFoundError:
             print("❌ Arquivo não encontrado.")
             continue
@@ -272,7 +434,7 @@ if __name__ == "__main__":
             print("❌ Número inválido.")
             continue
 
-        gerar_baralho(header, linhas, aves_obrigatorias, total)
+        gerar_baralho(dataset, aves_obrigatorias, total, segundos_carga)
 
         if input("\nDeseja rodar novamente? (s/n): ").strip().lower() != "s":
             print("\n🫶 Obrigada por usar! Foi feito com amor de presente para meu melhor amigo Dani <3 Até a próxima!")
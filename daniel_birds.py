@@ -0,0 +1,1920 @@
+"""Motor do Projeto Daniel Birds: base de aves compilada e os motores de busca, sem perguntas nem impressão."""
+import contextlib
+import csv
+import hashlib
+import itertools
+import json
+import mmap
+import random
+import math
+import os
+import queue
+import struct
+import tempfile
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+
+# ==== CONFIGURAÇÕES DE GRUPOS (mesma lógica original) ====
+GRUPOS = {
+    "TAMANHO E COR": [11, 12, 13],
+    "TIPO DE NINHO": [14, 15, 16, 17],
+    "2 PONTOS": [19, 20, 21, 22],
+    "GEOGRAFIA": [23, 24],
+    "HABITATS": [5, 6, 7]
+}
+
+# ==== CARACTERÍSTICAS INDIVIDUAIS (fora dos grupos) ====
+CARACTERISTICAS_INDIVIDUAIS = [8, 9, 10, 18, 25, 26, 27, 28, 29, 30]
+
+# ==== CONFIGURAÇÃO SIMULATED ANNEALING ====
+SA_ITERATIONS = 1000000
+SA_T_INITIAL = 1.0
+SA_T_COOLING_RATE = 0.999995
+SA_INTERVALO_PARADA = 1000  # a cada quantas iterações uma cadeia confere se deve parar
+SA_LOTE = 1  # trocas candidatas avaliadas por iteração (1 = uma proposta por vez)
+SA_LOTE_CRITERIO = "melhor"  # "melhor": melhor das K passa pelo Metropolis; "metropolis": primeira aceita entre as K
+SA_INICIALIZADOR = "construtivo"  # "construtivo": guloso pelas faltas de cada característica; "ciclico": o original
+SA_AMOSTRAS_CONSTRUTIVO = 16  # candidatas sorteadas a cada ave adicionada pelo construtivo
+SA_PROPOSTA_GUIADA = 0.5  # fração das propostas que mira as características mais fora da meta (0 = só sorteio uniforme)
+SA_POLIMENTO = True  # busca local determinística (1 e 2 trocas) quando o recozimento termina fora da tolerância
+SA_POLIMENTO_PRIMEIRAS = 32  # primeiras trocas testadas em cada rodada de pares de trocas
+SA_T_AUTO = True  # calibra a temperatura inicial por uma amostra de trocas (False = SA_T_INITIAL e resfriamento fixo)
+SA_AMOSTRAS_CALIBRACAO = 500  # trocas sorteadas para medir o tamanho típico de uma piora
+SA_ACEITACAO_INICIAL = 0.3  # chance de aceitar uma piora típica na temperatura calibrada
+SA_JANELA_ACEITACAO = 1000  # iterações entre ajustes do resfriamento pela taxa de aceitação
+SA_ACEITACAO_ALVO = 0.2  # acima dessa taxa de aceitação a janela esfria mais rápido
+SA_RESFRIAMENTO_RAPIDO = 0.8  # fator extra aplicado à temperatura quando a aceitação passa do alvo
+# (o ajuste só acelera o resfriamento; quando a aceitação despenca, quem devolve calor é o reaquecimento abaixo)
+SA_JANELA_REAQUECIMENTO = 20000  # iterações sem melhora até voltar ao melhor baralho e reaquecer (None = nunca)
+SA_FATOR_REAQUECIMENTO = 0.1  # fração da temperatura inicial usada ao reaquecer
+SA_JANELA_ESTAGNACAO = 200000  # iterações sem melhora até desistir da cadeia (None = nunca)
+SA_RASTRO_INTERVALO = 1000  # a cada quantas iterações o rastro (quando ligado) guarda energia e temperatura
+SA_SALVAMENTO_SEGUNDOS = 30  # intervalo entre dois salvamentos de uma execução (quando ligado)
+
+# ==== CONFIGURAÇÃO TROCA DE RÉPLICAS (parallel tempering) ====
+PT_TEMPERATURAS = [0.05, 0.1, 0.2, 0.4, 0.8, 1.6, 3.2]
+PT_RODADAS = 2000
+PT_PASSOS_POR_RODADA = 500
+
+# ==== CONFIGURAÇÃO BUSCA TABU ====
+TABU_ITERACOES = 50000
+TABU_VIZINHANCA = 64  # trocas sorteadas avaliadas a cada iteração (a melhor não proibida é feita)
+TABU_POSSE = 10  # iterações em que uma ave que acabou de trocar de lado não pode voltar
+TABU_JANELA_ESTAGNACAO = 5000  # iterações sem melhora até desistir (None = nunca)
+TABU_INTERVALO_PARADA = 10  # a cada quantas iterações a busca confere se deve parar
+
+# ==== CONFIGURAÇÃO BUSCA EXATA ====
+EXATO_LIMITE_SEGUNDOS = 60
+EXATO_INTERVALO_RELOGIO = 1024  # a cada quantos nós a busca confere o relógio
+
+MOTORES = ("recozimento", "replicas", "exato", "tabu")
+
+def ler_csv(caminho_csv):
+    # Gerador: o cabeçalho e depois uma linha por vez, sem guardar o arquivo inteiro na memória
+    with open(caminho_csv, newline='', encoding='utf-8') as f:
+        yield from csv.reader(f)
+
+def carregar_csv(caminho_csv):
+    linhas = ler_csv(caminho_csv)
+    header = next(linhas, [])
+    return header, list(linhas)
+
+# ==== BASE DE AVES COMPILADA (uma máscara de bits por ave) ====
+def colunas_usadas():
+    colunas = [col for ids in GRUPOS.values() for col in ids]
+    colunas += [col for col in CARACTERISTICAS_INDIVIDUAIS if col not in colunas]
+    return colunas
+
+def tem_x(linha, col_id):
+    return col_id <= len(linha) and linha[col_id - 1].strip().upper() == "X"
+
+def mascara_da_linha(linha, colunas):
+    mascara = 0
+    for j, col in enumerate(colunas):
+        if tem_x(linha, col):
+            mascara |= 1 << j
+    return mascara
+
+class Dataset:
+    """Aves do CSV já convertidas: cada ave é um id inteiro e suas características um inteiro de bits."""
+
+    def __init__(self, header, linhas, colunas=None, caminho=None):
+        colunas = list(colunas) if colunas is not None else colunas_usadas()
+        nomes = [linha[0] if linha else "" for linha in linhas]
+        self._montar(header, nomes, [mascara_da_linha(linha, colunas) for linha in linhas], colunas, caminho)
+        self.linhas = linhas
+
+    @classmethod
+    def compilado(cls, header, nomes, mascaras, colunas, caminho=None):
+        # Monta direto das máscaras (ex.: vindas do cache), sem as linhas originais do CSV
+        dataset = cls.__new__(cls)
+        dataset._montar(header, nomes, mascaras, colunas, caminho)
+        dataset.linhas = None
+        return dataset
+
+    def _montar(self, header, nomes, mascaras, colunas, caminho):
+        self.header = header
+        self.nomes = nomes
+        self.colunas = colunas
+        self.caminho = caminho
+        self.bit = {col: j for j, col in enumerate(colunas)}
+        self.mascaras = mascaras
+        self.posicoes = [tuple(bits_de(mascara)) for mascara in mascaras]
+        self.mascara_individuais = self.mascara_de(CARACTERISTICAS_INDIVIDUAIS)
+
+    def __len__(self):
+        return len(self.mascaras)
+
+    def mascara_de(self, col_ids):
+        mascara = 0
+        for col in col_ids:
+            mascara |= 1 << self.bit[col]
+        return mascara
+
+def compilar_csv(caminho_csv, colunas=None):
+    # Lê o CSV linha a linha e guarda só o nome e a máscara de cada ave; o resto da linha é descartado na hora
+    colunas = list(colunas) if colunas is not None else colunas_usadas()
+    linhas = ler_csv(caminho_csv)
+    header = next(linhas, [])
+    nomes, mascaras = [], []
+    for linha in linhas:
+        nomes.append(linha[0] if linha else "")
+        mascaras.append(mascara_da_linha(linha, colunas))
+    return Dataset.compilado(header, nomes, mascaras, colunas, caminho_csv)
+
+def linhas_originais(dataset, baralho):
+    # Linhas completas do CSV para exportar; sem as linhas na memória, relê o arquivo guardando só as do baralho
+    if dataset.linhas is not None:
+        return [dataset.linhas[i] for i in baralho]
+    ids = set(baralho)
+    escolhidas = {}
+    for i, linha in enumerate(itertools.islice(ler_csv(dataset.caminho), 1, None)):
+        if i in ids:
+            escolhidas[i] = linha
+    return [escolhidas[i] for i in baralho]
+
+# ==== CACHE COMPILADO EM DISCO (ao lado do CSV) ====
+CACHE_EXTENSAO = ".cache"
+CACHE_ASSINATURA = b"DBIRDS01"
+
+def caminho_cache(caminho_csv):
+    return caminho_csv + CACHE_EXTENSAO
+
+def hash_arquivo(caminho):
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+def salvar_cache(dataset, caminho_csv, info=None, sha256=None):
+    # Formato: assinatura, tamanho do cabeçalho JSON (uint32), cabeçalho JSON e as máscaras com largura fixa.
+    # info e sha256 têm que descrever o mesmo conteúdo de onde as máscaras saíram (veja carregar_dataset).
+    info = info or os.stat(caminho_csv)
+    largura = max(1, (len(dataset.colunas) + 7) // 8)
+    meta = json.dumps({
+        "tamanho": info.st_size,
+        "mtime_ns": info.st_mtime_ns,
+        "sha256": sha256 or hash_arquivo(caminho_csv),
+        "colunas": dataset.colunas,
+        "individuais": CARACTERISTICAS_INDIVIDUAIS,
+        "largura": largura,
+        "header": dataset.header,
+        "nomes": dataset.nomes,
+    }, ensure_ascii=False).encode("utf-8")
+    destino = caminho_cache(caminho_csv)
+    # Nome temporário único: vários processos (ex.: os do servidor) podem gravar o cache do mesmo CSV ao mesmo tempo
+    fd, temporario = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(destino)), prefix=os.path.basename(destino),
+                                      suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(CACHE_ASSINATURA)
+            f.write(struct.pack("<I", len(meta)))
+            f.write(meta)
+            f.write(b"".join(m.to_bytes(largura, "little") for m in dataset.mascaras))
+        os.replace(temporario, destino)
+    except BaseException:
+        os.remove(temporario)
+        raise
+
+def ler_cache(caminho_csv):
+    # None quando não há cache, ele está corrompido ou não corresponde mais ao CSV / à configuração
+    destino = caminho_cache(caminho_csv)
+    try:
+        info = os.stat(caminho_csv)
+        with open(destino, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            inicio = len(CACHE_ASSINATURA)
+            if mm[:inicio] != CACHE_ASSINATURA:
+                return None
+            (tamanho_meta,) = struct.unpack_from("<I", mm, inicio)
+            inicio += 4
+            meta = json.loads(mm[inicio:inicio + tamanho_meta].decode("utf-8"))
+            inicio += tamanho_meta
+            if meta["colunas"] != colunas_usadas() or meta["individuais"] != CARACTERISTICAS_INDIVIDUAIS:
+                return None
+            so_mtime = (meta["tamanho"], meta["mtime_ns"]) != (info.st_size, info.st_mtime_ns)
+            if so_mtime and (meta["tamanho"] != info.st_size or meta["sha256"] != hash_arquivo(caminho_csv)):
+                return None
+            largura = meta["largura"]
+            n = len(meta["nomes"])
+            if len(mm) - inicio != n * largura:
+                return None
+            de_bytes = int.from_bytes
+            mascaras = [de_bytes(mm[k:k + largura], "little") for k in range(inicio, inicio + n * largura, largura)]
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+    dataset = Dataset.compilado(meta["header"], meta["nomes"], mascaras, meta["colunas"], caminho_csv)
+    if so_mtime:
+        # Mesmo conteúdo com outra data (ex.: arquivo copiado): regrava o cabeçalho para não refazer o hash toda vez
+        try:
+            salvar_cache(dataset, caminho_csv, info, meta["sha256"])
+        except OSError:
+            pass
+    return dataset
+
+def carregar_dataset(caminho_csv, usar_cache=True):
+    if not usar_cache:
+        return compilar_csv(caminho_csv)
+    dataset = ler_cache(caminho_csv)
+    if dataset is not None:
+        return dataset
+    # Hash antes e data depois da leitura: se o CSV mudar no meio, o cache não junta máscaras velhas com hash novo
+    info = os.stat(caminho_csv)
+    sha256 = hash_arquivo(caminho_csv)
+    dataset = compilar_csv(caminho_csv)
+    depois = os.stat(caminho_csv)
+    if (depois.st_size, depois.st_mtime_ns) == (info.st_size, info.st_mtime_ns):
+        try:
+            salvar_cache(dataset, caminho_csv, info, sha256)
+        except OSError:
+            pass  # pasta sem permissão de escrita: segue sem cache
+    return dataset
+
+def bits_de(mascara):
+    while mascara:
+        menor = mascara & -mascara
+        yield menor.bit_length() - 1
+        mascara ^= menor
+
+def contar_proporcao(dataset, baralho, col_id):
+    total = len(baralho)
+    if total == 0:
+        return 0.0
+    bit = 1 << dataset.bit[col_id]
+    mascaras = dataset.mascaras
+    com_x = sum(1 for i in baralho if mascaras[i] & bit)
+    return (com_x / total) * 100
+
+def contar_proporcao_grupo(dataset, baralho, col_ids):
+    total = len(baralho)
+    if total == 0:
+        return 0.0
+    grupo = dataset.mascara_de(col_ids)
+    mascaras = dataset.mascaras
+    com_x = sum(1 for i in baralho if mascaras[i] & grupo)
+    return (com_x / total) * 100
+
+def calcular_energia(dataset, baralho, proporcoes_alvo_caracteristica, total_aves):
+    if len(baralho) != total_aves:
+        return float('inf')
+    energia = 0.0
+    for col_id, desejada in proporcoes_alvo_caracteristica.items():
+        prop_obtida = contar_proporcao(dataset, baralho, col_id)
+        energia += abs(prop_obtida - desejada)
+    for col_id in CARACTERISTICAS_INDIVIDUAIS:
+        if contar_proporcao(dataset, baralho, col_id) <= 0.0:
+            return float('inf')
+    return energia
+
+# ==== AVALIAÇÃO INCREMENTAL (contagens por característica) ====
+def alvos_por_bit(dataset, proporcoes_alvo_caracteristica):
+    # None para as colunas sem proporção alvo (ex.: características individuais)
+    return [proporcoes_alvo_caracteristica.get(col) for col in dataset.colunas]
+
+def contar_caracteristicas(dataset, baralho):
+    contagens = [0] * len(dataset.colunas)
+    mascaras = dataset.mascaras
+    for i in baralho:
+        for j in bits_de(mascaras[i]):
+            contagens[j] += 1
+    return contagens
+
+def energia_por_contagens(contagens, alvos, mascara_individuais, total_aves):
+    energia = 0.0
+    for j, desejada in enumerate(alvos):
+        if desejada is not None:
+            energia += abs(contagens[j] / total_aves * 100 - desejada)
+    for j in bits_de(mascara_individuais):
+        if contagens[j] <= 0:
+            return float('inf')
+    return energia
+
+def calcular_delta_energia(contagens, mascara_removida, mascara_adicionada, alvos, mascara_individuais, total_aves):
+    # Só as características em que as duas aves diferem mudam de contagem
+    delta = 0.0
+    for j in bits_de(mascara_removida ^ mascara_adicionada):
+        atual = contagens[j]
+        nova = atual - 1 if (mascara_removida >> j) & 1 else atual + 1
+        if nova <= 0 and (mascara_individuais >> j) & 1:
+            return float('inf')
+        desejada = alvos[j]
+        if desejada is not None:
+            delta += abs(nova / total_aves * 100 - desejada) - abs(atual / total_aves * 100 - desejada)
+    return delta
+
+def aplicar_troca(contagens, mascara_removida, mascara_adicionada):
+    for j in bits_de(mascara_removida & ~mascara_adicionada):
+        contagens[j] -= 1
+    for j in bits_de(mascara_adicionada & ~mascara_removida):
+        contagens[j] += 1
+
+def faixas_permitidas(dataset, proporcoes_alvo_caracteristica, tolerancia, total_aves):
+    # (mínimo, máximo) de aves com cada característica para passar em verificar_resultado_final; None se nenhuma contagem serve
+    agrupadas = {col for ids in GRUPOS.values() for col in ids}
+    faixas = []
+    for j, col in enumerate(dataset.colunas):
+        permitidas = list(range(total_aves + 1))
+        if col in agrupadas:
+            desejada = proporcoes_alvo_caracteristica.get(col, 0.0)
+            permitidas = [c for c in permitidas if abs((c / total_aves) * 100 - desejada) <= tolerancia]
+        if (dataset.mascara_individuais >> j) & 1:
+            permitidas = [c for c in permitidas if c > 0]
+        if not permitidas:
+            return None
+        faixas.append((permitidas[0], permitidas[-1]))
+    return faixas
+
+# ==== AVALIAÇÃO EM LOTE (K trocas candidatas por iteração) ====
+def tabelas_delta(contagens, alvos, total_aves):
+    # Variação de energia de +1 e de -1 em cada característica
+    mais = [0.0] * len(contagens)
+    menos = [0.0] * len(contagens)
+    for j, c in enumerate(contagens):
+        desejada = alvos[j]
+        if desejada is not None:
+            atual = abs(c / total_aves * 100 - desejada)
+            mais[j] = abs((c + 1) / total_aves * 100 - desejada) - atual
+            menos[j] = abs((c - 1) / total_aves * 100 - desejada) - atual
+    return mais, menos
+
+def delta_por_tabelas(tabelas, posicoes, mascaras, removida, adicionada):
+    # Mesma conta de calcular_delta_energia, somando as tabelas só nas características de cada ave
+    mais, menos = tabelas
+    delta = sum(map(mais.__getitem__, posicoes[adicionada])) + sum(map(menos.__getitem__, posicoes[removida]))
+    comum = mascaras[removida] & mascaras[adicionada]
+    while comum:
+        menor = comum & -comum
+        j = menor.bit_length() - 1
+        delta -= mais[j] + menos[j]
+        comum ^= menor
+    return delta
+
+def escolher_do_lote(estado, posicoes, tabelas, k, criterio, T, rng):
+    # Devolve ((k_dentro, k_fora, delta) ou None, quantas candidatas foram avaliadas)
+    if len(estado.dentro) == estado.n_fixas or not estado.fora:
+        return None, 0
+    criticas = estado.criticas
+    mascaras, dentro, fora = estado.mascaras, estado.dentro, estado.fora
+    base, n_livres, n_fora = estado.n_fixas, len(dentro) - estado.n_fixas, len(fora)
+    sorteio = rng.random
+    melhor = None
+    for avaliadas in range(1, k + 1):
+        k_dentro = base + int(sorteio() * n_livres)
+        k_fora = int(sorteio() * n_fora)
+        removida, adicionada = dentro[k_dentro], fora[k_fora]
+        if mascaras[removida] & criticas & ~mascaras[adicionada]:
+            continue
+        delta = delta_por_tabelas(tabelas, posicoes, mascaras, removida, adicionada)
+        if criterio == "metropolis":
+            if delta < 0 or sorteio() < math.exp(-delta / T):
+                return (k_dentro, k_fora, delta), avaliadas
+        elif melhor is None or delta < melhor[2]:
+            melhor = (k_dentro, k_fora, delta)
+    if melhor is not None and criterio != "metropolis":
+        if melhor[2] < 0 or sorteio() < math.exp(-melhor[2] / T):
+            return melhor, k
+    return None, k
+
+# ==== ÍNDICE DAS AVES FORA DO BARALHO (sorteio por característica) ====
+class IndiceLivres:
+    """Para cada característica, as aves fora do baralho que a têm: sortear, tirar e devolver uma ave custa O(características dela).
+
+    A lista extra no fim (índice `qualquer`) guarda todas as aves livres, com ou sem X.
+    """
+
+    def __init__(self, dataset, livres):
+        self.posicoes = dataset.posicoes
+        self.qualquer = len(dataset.colunas)
+        self.listas = [[] for _ in range(self.qualquer + 1)]
+        self.lugar = [None] * len(dataset)  # lugar[i][j]: posição da ave i na lista da característica j
+        for i in livres:
+            self.devolver(i)
+
+    @classmethod
+    def de_listas(cls, dataset, listas):
+        # Reconstrói o índice com as listas na mesma ordem (ex.: vindas de um salvamento), para o sorteio seguir igual
+        indice = cls(dataset, ())
+        indice.listas = [list(lista) for lista in listas]
+        for j, lista in enumerate(indice.listas):
+            for p, i in enumerate(lista):
+                if indice.lugar[i] is None:
+                    indice.lugar[i] = {}
+                indice.lugar[i][j] = p
+        return indice
+
+    def _chaves(self, i):
+        return self.posicoes[i] + (self.qualquer,)
+
+    def devolver(self, i):
+        lugares = {}
+        for j in self._chaves(i):
+            lista = self.listas[j]
+            lugares[j] = len(lista)
+            lista.append(i)
+        self.lugar[i] = lugares
+
+    def tirar(self, i):
+        # A última ave de cada lista ocupa o lugar da que saiu
+        for j, p in self.lugar[i].items():
+            lista = self.listas[j]
+            ultima = lista.pop()
+            if ultima != i:
+                lista[p] = ultima
+                self.lugar[ultima][j] = p
+        self.lugar[i] = None
+
+    def sortear(self, j, rng):
+        lista = self.listas[self.qualquer if j is None else j]
+        return lista[int(rng.random() * len(lista))] if lista else None
+
+def inicializar_baralho(dataset, total_aves, proporcoes_alvo_caracteristica, must_include, rng=random):
+    baralho_set = set(must_include)
+    livres = IndiceLivres(dataset, (i for i in range(len(dataset)) if i not in baralho_set))
+    for col_id in CARACTERISTICAS_INDIVIDUAIS:
+        escolhido = livres.sortear(dataset.bit[col_id], rng)
+        if escolhido is not None:
+            baralho_set.add(escolhido)
+            livres.tirar(escolhido)
+    aves_faltando = total_aves - len(baralho_set)
+    proporcoes_ordenadas = sorted(proporcoes_alvo_caracteristica.items(), key=lambda x: x[1], reverse=True)
+    adicoes, idx = 0, 0
+    while adicoes < aves_faltando:
+        col_prioritaria = proporcoes_ordenadas[idx % len(proporcoes_ordenadas)][0]
+        escolhido = livres.sortear(dataset.bit[col_prioritaria], rng)
+        if escolhido is None:
+            escolhido = livres.sortear(None, rng)
+            if escolhido is None:
+                break
+        baralho_set.add(escolhido)
+        livres.tirar(escolhido)
+        adicoes += 1
+        idx += 1
+    baralho = list(baralho_set)
+    rng.shuffle(baralho)
+    return baralho if len(baralho) == total_aves else None
+
+def construir_baralho(dataset, total_aves, proporcoes_alvo_caracteristica, must_include, rng=random, amostras=None):
+    # Guloso aleatorizado: cada ave nova é a melhor de algumas sorteadas (metade entre as que têm a característica
+    # mais em falta). "Melhor" é a ave cujo vetor de características fica mais perto da fração que ainda falta
+    # de cada característica por vaga restante.
+    amostras = amostras or SA_AMOSTRAS_CONSTRUTIVO
+    baralho = list(dict.fromkeys(must_include))
+    baralho_set = set(baralho)
+    livres = IndiceLivres(dataset, (i for i in range(len(dataset)) if i not in baralho_set))
+    contagens = contar_caracteristicas(dataset, baralho)
+    metas = [None if d is None else d * total_aves / 100 for d in alvos_por_bit(dataset, proporcoes_alvo_caracteristica)]
+    posicoes = dataset.posicoes
+
+    def custo(i):
+        # Distância quadrática até a taxa desejada, sem a parte que é igual para todas as aves
+        vagas = total_aves - len(baralho)
+        total = 0.0
+        for j in posicoes[i]:
+            meta = metas[j]
+            if meta is not None:
+                taxa = min(1.0, max(0.0, (meta - contagens[j]) / vagas))
+                total += 1 - 2 * taxa
+        return total
+
+    def adicionar(i):
+        baralho.append(i)
+        baralho_set.add(i)
+        livres.tirar(i)
+        for j in posicoes[i]:
+            contagens[j] += 1
+
+    def melhor_de(candidatas):
+        custos = [(custo(i), i) for i in candidatas if i is not None]
+        if not custos:
+            return None
+        menor = min(c for c, _ in custos)
+        return rng.choice([i for c, i in custos if c == menor])
+
+    for j in bits_de(dataset.mascara_individuais):
+        if contagens[j] == 0 and len(baralho) < total_aves:
+            escolhida = melhor_de(livres.sortear(j, rng) for _ in range(amostras))
+            if escolhida is not None:
+                adicionar(escolhida)
+
+    while len(baralho) < total_aves:
+        faltas = [(meta - contagens[j], j) for j, meta in enumerate(metas) if meta is not None and livres.listas[j]]
+        em_falta = max(faltas)[1] if faltas and max(faltas)[0] > 0 else None
+        candidatas = [livres.sortear(em_falta, rng) for _ in range(amostras // 2)] if em_falta is not None else []
+        candidatas += [livres.sortear(None, rng) for _ in range(amostras - len(candidatas))]
+        escolhida = melhor_de(candidatas)
+        if escolhida is None:
+            break
+        adicionar(escolhida)
+
+    return baralho if len(baralho) == total_aves else None
+
+def baralho_inicial(dataset, total_aves, proporcoes_alvo_caracteristica, must_include, rng=random, inicializador=None):
+    if (inicializador or SA_INICIALIZADOR) == "ciclico":
+        return inicializar_baralho(dataset, total_aves, proporcoes_alvo_caracteristica, must_include, rng)
+    return construir_baralho(dataset, total_aves, proporcoes_alvo_caracteristica, must_include, rng)
+
+# ==== ESTADO DO BARALHO (índices dentro/fora) ====
+class EstadoBaralho:
+    """Baralho como dois vetores de ids (dentro/fora) com mapa de posições e contagens por característica.
+
+    As aves obrigatórias ficam fixas em dentro[:n_fixas], fora da região sorteável.
+    """
+
+    def __init__(self, dataset, baralho, must_include):
+        fixas = list(dict.fromkeys(must_include))
+        fixas_set = set(fixas)
+        no_baralho = set(baralho) | fixas_set
+        self.dataset = dataset
+        self.mascaras = dataset.mascaras
+        self.dentro = fixas + [i for i in dict.fromkeys(baralho) if i not in fixas_set]
+        self.fora = [i for i in range(len(dataset)) if i not in no_baralho]
+        self.n_fixas = len(fixas)
+        self.pos = [0] * len(dataset)
+        for k, i in enumerate(self.dentro):
+            self.pos[i] = k
+        for k, i in enumerate(self.fora):
+            self.pos[i] = k
+        self.contagens = contar_caracteristicas(dataset, self.dentro)
+        self.individuais = dataset.mascara_individuais
+        self.criticas = 0  # características individuais com no máximo uma ave no baralho
+        for j in bits_de(self.individuais):
+            if self.contagens[j] <= 1:
+                self.criticas |= 1 << j
+        self.livres = None
+        self.trocaveis = None
+        self.faixas = None
+        self.fora_da_faixa = 0
+
+    def salvar(self):
+        """O que as contagens não dizem: a ordem de dentro/fora e a dos índices de sorteio."""
+        return {
+            "dentro": list(self.dentro),
+            "fora": list(self.fora),
+            "livres": None if self.livres is None else self.livres.listas,
+            "trocaveis": None if self.trocaveis is None else self.trocaveis.listas,
+        }
+
+    @classmethod
+    def de_salvamento(cls, dataset, dados, must_include):
+        estado = cls(dataset, dados["dentro"], must_include)
+        estado.dentro = list(dados["dentro"])
+        estado.fora = list(dados["fora"])
+        for k, i in enumerate(estado.dentro):
+            estado.pos[i] = k
+        for k, i in enumerate(estado.fora):
+            estado.pos[i] = k
+        if dados["livres"] is not None:
+            estado.livres = IndiceLivres.de_listas(dataset, dados["livres"])
+        if dados["trocaveis"] is not None:
+            estado.trocaveis = IndiceLivres.de_listas(dataset, dados["trocaveis"])
+        return estado
+
+    def vigiar_faixas(self, faixas):
+        """Passa a contar, a cada troca, quantas características estão fora de faixas[j] = (mínimo, máximo)."""
+        self.faixas = faixas
+        self.fora_da_faixa = sum(1 for c, (lo, hi) in zip(self.contagens, faixas) if not lo <= c <= hi)
+
+    def indice_livres(self):
+        # Criado só quando algum movimento precisa sortear por característica; depois segue cada troca
+        if self.livres is None:
+            self.livres = IndiceLivres(self.dataset, self.fora)
+        return self.livres
+
+    def indice_trocaveis(self):
+        # O mesmo índice do lado de dentro, só com as aves que podem sair (as obrigatórias ficam de fora)
+        if self.trocaveis is None:
+            self.trocaveis = IndiceLivres(self.dataset, self.dentro[self.n_fixas:])
+        return self.trocaveis
+
+    def restaurar(self, baralho):
+        """Volta ao baralho dado (mesmo tamanho e mesmas fixas) trocando só as aves que diferem."""
+        alvo = set(baralho)
+        atual = set(self.dentro)
+        entrar = [i for i in baralho if i not in atual]
+        sair = [k for k in range(self.n_fixas, len(self.dentro)) if self.dentro[k] not in alvo]
+        for k, i in zip(sair, entrar):
+            self.trocar(k, self.pos[i])
+
+    def trocar(self, k_dentro, k_fora):
+        removida = self.dentro[k_dentro]
+        adicionada = self.fora[k_fora]
+        self.dentro[k_dentro] = adicionada
+        self.fora[k_fora] = removida
+        self.pos[adicionada] = k_dentro
+        self.pos[removida] = k_fora
+        m_rem, m_add = self.mascaras[removida], self.mascaras[adicionada]
+        aplicar_troca(self.contagens, m_rem, m_add)
+        for j in bits_de((m_rem ^ m_add) & self.individuais):
+            if self.contagens[j] <= 1:
+                self.criticas |= 1 << j
+            else:
+                self.criticas &= ~(1 << j)
+        if self.faixas is not None:
+            for j in bits_de(m_rem ^ m_add):
+                lo, hi = self.faixas[j]
+                c = self.contagens[j]
+                antes = c + 1 if (m_rem >> j) & 1 else c - 1
+                self.fora_da_faixa += (not lo <= c <= hi) - (not lo <= antes <= hi)
+        if self.livres is not None:
+            self.livres.tirar(adicionada)
+            self.livres.devolver(removida)
+        if self.trocaveis is not None:
+            self.trocaveis.tirar(removida)
+            self.trocaveis.devolver(adicionada)
+
+def gerar_vizinho(estado, rng=random):
+    # Nunca tira a única ave de uma característica individual, a menos que a que entra também a tenha
+    if len(estado.dentro) == estado.n_fixas or not estado.fora:
+        return None
+    k_fora = rng.randrange(len(estado.fora))
+    proibidas = estado.criticas & ~estado.mascaras[estado.fora[k_fora]]
+    for _ in range(32):
+        k_dentro = rng.randrange(estado.n_fixas, len(estado.dentro))
+        if not estado.mascaras[estado.dentro[k_dentro]] & proibidas:
+            return k_dentro, k_fora
+    return None
+
+def metas_por_bit(alvos, total_aves):
+    # (bit, contagem alvo) de cada característica com proporção alvo
+    return [(j, desejada * total_aves / 100) for j, desejada in enumerate(alvos) if desejada is not None]
+
+def gerar_vizinho_guiado(estado, metas, rng=random):
+    """Troca que tira uma ave da característica mais acima da meta e põe uma da mais abaixo.
+
+    Cada lado cai no sorteio uniforme quando não há característica desse lado ou ave para sortear.
+    """
+    if len(estado.dentro) == estado.n_fixas or not estado.fora:
+        return None
+    contagens = estado.contagens
+    j_sobra = j_falta = None
+    sobra = falta = 0.0
+    for j, meta in metas:
+        desvio = contagens[j] - meta
+        if desvio > sobra:
+            j_sobra, sobra = j, desvio
+        elif desvio < falta:
+            j_falta, falta = j, desvio
+    sai = estado.indice_trocaveis().sortear(j_sobra, rng)
+    entra = estado.indice_livres().sortear(j_falta, rng)
+    if sai is None or entra is None or estado.mascaras[sai] & estado.criticas & ~estado.mascaras[entra]:
+        return gerar_vizinho(estado, rng)
+    return estado.pos[sai], estado.pos[entra]
+
+def verificar_resultado_final(dataset, baralho_final, proporcoes_alvo_caracteristica, tolerancia):
+    for ids in GRUPOS.values():
+        for col_id in ids:
+            desejada = proporcoes_alvo_caracteristica.get(col_id, 0.0)
+            if abs(contar_proporcao(dataset, baralho_final, col_id) - desejada) > tolerancia:
+                return False
+    for col_id in CARACTERISTICAS_INDIVIDUAIS:
+        if contar_proporcao(dataset, baralho_final, col_id) <= 0.0:
+            return False
+    return True
+
+def proporcoes_por_caracteristica(proporcoes_grupos_input):
+    return {
+        col: proporcoes_grupos_input[nome]
+        for nome, ids in GRUPOS.items()
+        for col in ids
+    }
+
+def ids_obrigatorios(dataset, must_include_input):
+    nomes_must = [m.strip().lower() for m in must_include_input if m.strip()]
+    return [i for i, nome in enumerate(dataset.nomes) if nome.strip().lower() in nomes_must]
+
+# ==== RASTRO (instrumentação opcional de uma execução) ====
+class Rastro:
+    """Tempo por fase, trocas aceitas/rejeitadas, amostras de temperatura e energia e cada novo melhor baralho."""
+
+    CAMPOS_CSV = ["evento", "iteracao", "segundos", "temperatura", "energia", "melhor_energia", "aceitas", "rejeitadas"]
+
+    def __init__(self, intervalo=None):
+        self.intervalo = intervalo or SA_RASTRO_INTERVALO
+        self.inicio = time.perf_counter()
+        self.fases = {}  # fase: segundos somados
+        self.aceitas = 0
+        self.rejeitadas = 0
+        self.amostras = []  # (iteração, segundos, temperatura, energia, melhor energia, aceitas, rejeitadas)
+        self.melhoras = []  # (iteração, segundos, energia)
+
+    def somar(self, fase, segundos):
+        self.fases[fase] = self.fases.get(fase, 0.0) + segundos
+
+    @contextlib.contextmanager
+    def fase(self, nome):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.somar(nome, time.perf_counter() - t)
+
+    def amostrar(self, iteracao, temperatura, energia, melhor_energia):
+        self.amostras.append((iteracao, time.perf_counter() - self.inicio, temperatura, energia, melhor_energia,
+                              self.aceitas, self.rejeitadas))
+
+    def melhorou(self, iteracao, energia):
+        self.melhoras.append((iteracao, time.perf_counter() - self.inicio, energia))
+
+    def como_dict(self):
+        return {
+            "intervalo": self.intervalo,
+            "fases": dict(self.fases),
+            "aceitas": self.aceitas,
+            "rejeitadas": self.rejeitadas,
+            "amostras": [dict(zip(self.CAMPOS_CSV[1:], a)) for a in self.amostras],
+            "melhoras": [{"iteracao": i, "segundos": s, "energia": e} for i, s, e in self.melhoras],
+        }
+
+    def exportar(self, caminho):
+        # .json: tudo num objeto; senão CSV longo, uma linha por amostra, melhora ou fase (coluna "evento")
+        if caminho.lower().endswith(".json"):
+            with open(caminho, "w", encoding="utf-8") as f:
+                json.dump(self.como_dict(), f, indent=2)
+            return
+        with open(caminho, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.CAMPOS_CSV)
+            for amostra in self.amostras:
+                writer.writerow(["amostra", *amostra])
+            for iteracao, segundos, energia in self.melhoras:
+                writer.writerow(["melhora", iteracao, segundos, "", energia, energia, "", ""])
+            for nome, segundos in self.fases.items():
+                writer.writerow([f"fase:{nome}", "", segundos, "", "", "", "", ""])
+
+# ==== SALVAMENTO (retomar um recozimento interrompido do mesmo ponto) ====
+SALVAMENTO_ASSINATURA = b"DBSAVE01"
+SALVAMENTO_EXTENSAO = ".salvamento"
+class LacoRecozimento:
+    """Variáveis do laço do recozimento: com o baralho e o gerador aleatório, é tudo o que o salvamento guarda."""
+
+    __slots__ = ("T", "T0", "energia_atual", "energia_inicial", "melhor", "melhor_e", "iteracoes", "avaliacoes",
+                 "aceitas", "reaquecimentos", "ultima_melhora", "ultimo_reaquecimento", "guiadas", "aceitas_guiadas",
+                 "aceitas_uniformes", "aceitas_total", "rejeitadas_total")
+
+    def __init__(self, **valores):
+        for nome in self.__slots__:
+            setattr(self, nome, valores.get(nome, 0))
+
+    def como_dict(self):
+        return {nome: getattr(self, nome) for nome in self.__slots__}
+
+def impressao_digital(dataset):
+    # Identifica a base compilada, para não retomar um salvamento sobre outra base
+    h = hashlib.sha256(json.dumps(dataset.colunas).encode("utf-8"))
+    largura = max(1, (len(dataset.colunas) + 7) // 8)
+    h.update(b"".join(m.to_bytes(largura, "little") for m in dataset.mascaras))
+    return h.hexdigest()
+
+# Constantes SA_* que só mudam quando se olha o laço (parada, rastro, salvamento), não o caminho do recozimento
+CONSTANTES_FORA_DA_TRAJETORIA = ("SA_INTERVALO_PARADA", "SA_RASTRO_INTERVALO", "SA_SALVAMENTO_SEGUNDOS")
+
+def configuracao_recozimento():
+    return {nome: valor for nome, valor in globals().items()
+            if nome.startswith("SA_") and nome not in CONSTANTES_FORA_DA_TRAJETORIA}
+
+def gravar_salvamento(caminho, meta, vetores):
+    # Formato: assinatura, tamanho do cabeçalho JSON (uint32), cabeçalho JSON e as listas de ids em uint32.
+    # vetores: {nome: lista de listas de ids, ou None}; o cabeçalho guarda o tamanho de cada lista.
+    meta = dict(meta, vetores={nome: None if listas is None else [len(lista) for lista in listas]
+                               for nome, listas in vetores.items()})
+    cabecalho = json.dumps(meta).encode("utf-8")
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as f:
+        f.write(SALVAMENTO_ASSINATURA)
+        f.write(struct.pack("<I", len(cabecalho)))
+        f.write(cabecalho)
+        for listas in vetores.values():
+            for lista in listas or ():
+                f.write(struct.pack(f"<{len(lista)}I", *lista))
+    os.replace(temporario, caminho)
+
+def ler_salvamento(caminho):
+    with open(caminho, "rb") as f:
+        dados = f.read()
+    inicio = len(SALVAMENTO_ASSINATURA)
+    if dados[:inicio] != SALVAMENTO_ASSINATURA:
+        raise ValueError(f"{caminho} não é um arquivo de salvamento")
+    (tamanho,) = struct.unpack_from("<I", dados, inicio)
+    inicio += 4
+    meta = json.loads(dados[inicio:inicio + tamanho].decode("utf-8"))
+    inicio += tamanho
+    vetores = {}
+    for nome, tamanhos in meta.pop("vetores").items():
+        if tamanhos is None:
+            vetores[nome] = None
+            continue
+        vetores[nome] = []
+        for n in tamanhos:
+            vetores[nome].append(list(struct.unpack_from(f"<{n}I", dados, inicio)))
+            inicio += 4 * n
+    return meta, vetores
+
+def salvar_recozimento(caminho, dataset, parametros, rng, estado, laco):
+    versao, interno, gauss = rng.getstate()
+    baralho = estado.salvar()
+    meta = {
+        "base": impressao_digital(dataset),
+        "csv": os.path.abspath(dataset.caminho) if dataset.caminho else None,
+        "configuracao": configuracao_recozimento(),
+        "parametros": parametros,
+        "rng": [versao, list(interno), gauss],
+        "dentro": baralho["dentro"],
+        "laco": laco,
+    }
+    gravar_salvamento(caminho, meta, {"fora": [baralho["fora"]], "livres": baralho["livres"], "trocaveis": baralho["trocaveis"]})
+
+def ler_salvamento_recozimento(caminho, dataset):
+    """Salvamento pronto para recozer(continuar=...); ValueError se a base ou a configuração SA_* mudaram."""
+    meta, vetores = ler_salvamento(caminho)
+    if meta["base"] != impressao_digital(dataset):
+        raise ValueError("O salvamento foi feito com outra base de aves")
+    atual = configuracao_recozimento()
+    mudou = sorted(nome for nome, valor in meta["configuracao"].items()
+                   if nome not in CONSTANTES_FORA_DA_TRAJETORIA and atual.get(nome) != valor)
+    if mudou:
+        raise ValueError(f"A configuração mudou desde o salvamento: {', '.join(mudou)}")
+    if sorted(meta["laco"]) != sorted(LacoRecozimento.__slots__):
+        raise ValueError("O salvamento foi feito por outra versão do recozimento")
+    versao, interno, gauss = meta["rng"]
+    parametros = meta["parametros"]
+    parametros["proporcoes_alvo_caracteristica"] = {int(col): p for col, p in parametros["proporcoes_alvo_caracteristica"].items()}
+    return {
+        "parametros": parametros,
+        "rng": (versao, tuple(interno), gauss),
+        "estado": {"dentro": meta["dentro"], "fora": vetores["fora"][0], "livres": vetores["livres"],
+                   "trocaveis": vetores["trocaveis"]},
+        "laco": meta["laco"],
+    }
+
+# ==== RECOZIMENTO SIMULADO (sem entrada/saída) ====
+def calibrar_temperatura(estado, alvos, total_aves, rng, amostras=None):
+    """Temperatura em que uma piora média de uma amostra de trocas é aceita com chance SA_ACEITACAO_INICIAL."""
+    amostras = amostras or SA_AMOSTRAS_CALIBRACAO
+    mascaras = estado.mascaras
+    individuais = estado.dataset.mascara_individuais
+    pioras = []
+    for _ in range(amostras):
+        troca = gerar_vizinho(estado, rng)
+        if troca is None:
+            break
+        delta = calcular_delta_energia(estado.contagens, mascaras[estado.dentro[troca[0]]], mascaras[estado.fora[troca[1]]],
+                                       alvos, individuais, total_aves)
+        if 0 < delta < math.inf:
+            pioras.append(delta)
+    if not pioras:
+        return SA_T_INITIAL
+    return -(sum(pioras) / len(pioras)) / math.log(SA_ACEITACAO_INICIAL)
+
+def recozer(dataset, proporcoes_alvo_caracteristica, tolerancia, total_aves, must_include, semente=None, parar=None,
+            lote=None, criterio=None, max_iteracoes=None, inicializador=None, ao_melhorar=None, rastro=None,
+            salvar_em=None, continuar=None):
+    # ao_melhorar(baralho, energia, segundos) é chamada a cada novo melhor baralho; rastro (opcional) é um Rastro a preencher.
+    # salvar_em: arquivo gravado no início e regravado a cada SA_SALVAMENTO_SEGUNDOS (e ao parar); continuar: o que ler_salvamento_recozimento
+    # devolveu, para seguir exatamente de onde o salvamento parou.
+    inicio = time.perf_counter()
+    rng = random.Random(semente)
+    max_iteracoes = max_iteracoes or SA_ITERATIONS
+    lote = lote or SA_LOTE
+    criterio = criterio or SA_LOTE_CRITERIO
+    parametros = {
+        "proporcoes_alvo_caracteristica": proporcoes_alvo_caracteristica, "tolerancia": tolerancia,
+        "total_aves": total_aves, "must_include": list(must_include), "semente": semente,
+        "lote": lote, "criterio": criterio, "max_iteracoes": max_iteracoes,
+    }
+
+    mascaras = dataset.mascaras
+    alvos = alvos_por_bit(dataset, proporcoes_alvo_caracteristica)
+    individuais = dataset.mascara_individuais
+    faixas = faixas_permitidas(dataset, proporcoes_alvo_caracteristica, tolerancia, total_aves) if total_aves > 0 else None
+
+    if continuar is None:
+        bar_inicial = baralho_inicial(dataset, total_aves, proporcoes_alvo_caracteristica, must_include, rng, inicializador)
+        if bar_inicial is None:
+            return None
+        estado = EstadoBaralho(dataset, bar_inicial, must_include)
+        if faixas is not None:
+            estado.vigiar_faixas(faixas)
+        energia = energia_por_contagens(estado.contagens, alvos, individuais, total_aves)
+        T0 = calibrar_temperatura(estado, alvos, total_aves, rng) if SA_T_AUTO else SA_T_INITIAL
+        laco = LacoRecozimento(T=T0, T0=T0, energia_atual=energia, energia_inicial=energia, melhor=list(estado.dentro),
+                               melhor_e=energia)
+    else:
+        rng.setstate(continuar["rng"])
+        estado = EstadoBaralho.de_salvamento(dataset, continuar["estado"], must_include)
+        if faixas is not None:
+            estado.vigiar_faixas(faixas)
+        laco = LacoRecozimento(**continuar["laco"])
+    sucesso = faixas is not None and estado.fora_da_faixa == 0
+    # Execução nova salva já na iteração 0, para haver de onde retomar mesmo se for interrompida cedo
+    proximo_salvamento = time.perf_counter() + (SA_SALVAMENTO_SEGUNDOS if continuar is not None else 0)
+    if ao_melhorar is not None:
+        ao_melhorar(laco.melhor, laco.melhor_e, time.perf_counter() - inicio)
+
+    metas = metas_por_bit(alvos, total_aves)
+    medir = rastro is not None
+    if medir:
+        relogio = time.perf_counter
+        inicio_laco = relogio()
+        rastro.somar("inicializacao", inicio_laco - inicio)
+        rastro.melhorou(laco.iteracoes, laco.melhor_e)
+        t_vizinhos = 0.0
+
+    # Baralho só de obrigatórias, ou sem ninguém de fora para entrar: nenhuma troca é possível
+    sem_trocas = len(estado.dentro) == estado.n_fixas or not estado.fora
+    while not sucesso and not sem_trocas and laco.iteracoes < max_iteracoes:
+        if laco.iteracoes % SA_INTERVALO_PARADA == 0:
+            parando = parar is not None and parar.is_set()
+            if salvar_em is not None and (parando or time.perf_counter() >= proximo_salvamento):
+                salvar_recozimento(salvar_em, dataset, parametros, rng, estado, laco.como_dict())
+                proximo_salvamento = time.perf_counter() + SA_SALVAMENTO_SEGUNDOS
+            if parando:
+                break
+        laco.iteracoes += 1
+        if lote > 1:
+            # No lote, gerar e avaliar as K candidatas é um passo só (conta como avaliação no rastro)
+            tabelas = tabelas_delta(estado.contagens, alvos, total_aves)
+            escolha, avaliadas = escolher_do_lote(estado, dataset.posicoes, tabelas, lote, criterio, laco.T, rng)
+            laco.avaliacoes += avaliadas
+            if escolha is not None:
+                estado.trocar(escolha[0], escolha[1])
+                laco.energia_atual = energia_por_contagens(estado.contagens, alvos, individuais, total_aves)
+                laco.aceitas += 1
+                laco.aceitas_total += 1
+            else:
+                laco.rejeitadas_total += 1
+        else:
+            if medir:
+                t0 = relogio()
+            guiada = rng.random() < SA_PROPOSTA_GUIADA
+            troca = gerar_vizinho_guiado(estado, metas, rng) if guiada else gerar_vizinho(estado, rng)
+            if medir:
+                t_vizinhos += relogio() - t0
+            # Sem proposta nesta iteração (ex.: só sobrou trocar aves de característica individual): o laço segue igual
+            if troca is not None:
+                laco.avaliacoes += 1
+                laco.guiadas += guiada
+                k_dentro, k_fora = troca
+                m_rem, m_add = mascaras[estado.dentro[k_dentro]], mascaras[estado.fora[k_fora]]
+                delta = calcular_delta_energia(estado.contagens, m_rem, m_add, alvos, individuais, total_aves)
+
+                if delta < 0 or rng.random() < math.exp(-delta / laco.T):
+                    estado.trocar(k_dentro, k_fora)
+                    laco.energia_atual = energia_por_contagens(estado.contagens, alvos, individuais, total_aves)
+                    laco.aceitas += 1
+                    laco.aceitas_total += 1
+                    if guiada:
+                        laco.aceitas_guiadas += 1
+                    else:
+                        laco.aceitas_uniformes += 1
+                else:
+                    laco.rejeitadas_total += 1
+
+        if faixas is not None and estado.fora_da_faixa == 0:
+            laco.melhor, laco.melhor_e = list(estado.dentro), laco.energia_atual
+            sucesso = True
+            if ao_melhorar is not None:
+                ao_melhorar(laco.melhor, laco.melhor_e, time.perf_counter() - inicio)
+            if medir:
+                rastro.melhorou(laco.iteracoes, laco.melhor_e)
+            break
+        if laco.energia_atual < laco.melhor_e:
+            laco.melhor, laco.melhor_e = list(estado.dentro), laco.energia_atual
+            laco.ultima_melhora = laco.iteracoes
+            if ao_melhorar is not None:
+                ao_melhorar(laco.melhor, laco.melhor_e, time.perf_counter() - inicio)
+            if medir:
+                rastro.melhorou(laco.iteracoes, laco.melhor_e)
+
+        if medir and laco.iteracoes % rastro.intervalo == 0:
+            rastro.aceitas, rastro.rejeitadas = laco.aceitas_total, laco.rejeitadas_total
+            rastro.amostrar(laco.iteracoes, laco.T, laco.energia_atual, laco.melhor_e)
+        laco.T *= SA_T_COOLING_RATE
+        if laco.iteracoes % SA_JANELA_ACEITACAO == 0:
+            # Aceitando demais a cadeia só passeia: esfria mais rápido até a taxa cair para o alvo
+            if SA_T_AUTO and laco.aceitas > SA_ACEITACAO_ALVO * SA_JANELA_ACEITACAO:
+                laco.T *= SA_RESFRIAMENTO_RAPIDO
+            laco.aceitas = 0
+            sem_melhora = laco.iteracoes - max(laco.ultima_melhora, laco.ultimo_reaquecimento)
+            if SA_JANELA_ESTAGNACAO is not None and laco.iteracoes - laco.ultima_melhora >= SA_JANELA_ESTAGNACAO:
+                break
+            if SA_JANELA_REAQUECIMENTO is not None and sem_melhora >= SA_JANELA_REAQUECIMENTO:
+                estado.restaurar(laco.melhor)
+                laco.energia_atual = laco.melhor_e
+                laco.T = laco.T0 * SA_FATOR_REAQUECIMENTO
+                laco.ultimo_reaquecimento = laco.iteracoes
+                laco.reaquecimentos += 1
+
+    if medir:
+        # Avaliação = o resto do laço: variação de energia, Metropolis, troca e contabilidade
+        rastro.somar("vizinhos", t_vizinhos)
+        rastro.somar("avaliacao", relogio() - inicio_laco - t_vizinhos)
+        rastro.aceitas, rastro.rejeitadas = laco.aceitas_total, laco.rejeitadas_total
+        rastro.amostrar(laco.iteracoes, laco.T, laco.energia_atual, laco.melhor_e)
+
+    polidas = 0
+    if SA_POLIMENTO and not sucesso and (parar is None or not parar.is_set()):
+        t0 = time.perf_counter()
+        estado.restaurar(laco.melhor)
+        polidas = polir(estado, alvos, total_aves, parar=parar)
+        laco.energia_atual = energia_por_contagens(estado.contagens, alvos, individuais, total_aves)
+        if laco.energia_atual < laco.melhor_e:
+            laco.melhor, laco.melhor_e = list(estado.dentro), laco.energia_atual
+            if ao_melhorar is not None:
+                ao_melhorar(laco.melhor, laco.melhor_e, time.perf_counter() - inicio)
+            if medir:
+                rastro.melhorou(laco.iteracoes, laco.melhor_e)
+        sucesso = faixas is not None and estado.fora_da_faixa == 0
+        if medir:
+            rastro.somar("polimento", time.perf_counter() - t0)
+
+    # Conferência completa uma única vez: a contagem incremental tem que concordar com as proporções
+    t0 = time.perf_counter()
+    assert sucesso == verificar_resultado_final(dataset, laco.melhor, proporcoes_alvo_caracteristica, tolerancia)
+    if medir:
+        rastro.somar("verificacao", time.perf_counter() - t0)
+    return {
+        "baralho": laco.melhor,
+        "energia": laco.melhor_e,
+        "sucesso": sucesso,
+        "iteracoes": laco.iteracoes,
+        "avaliacoes": laco.avaliacoes,
+        "energia_inicial": laco.energia_inicial,
+        "trocas_polimento": polidas,
+        "temperatura_inicial": laco.T0,
+        "reaquecimentos": laco.reaquecimentos,
+        "propostas_guiadas": laco.guiadas,
+        "aceitas_guiadas": laco.aceitas_guiadas,
+        "aceitas_uniformes": laco.aceitas_uniformes,
+        "semente": semente,
+    }
+
+# ==== POLIMENTO (busca local determinística depois do recozimento) ====
+class ClassesDeTroca:
+    """Posições de dentro e de fora agrupadas pela máscara da ave: trocar aves de mesma máscara dá no mesmo.
+
+    A busca local varre uma ave de cada máscara distinta de cada lado, e não todos os pares de aves.
+    """
+
+    def __init__(self, estado):
+        self.estado = estado
+        self.bits = {}  # máscara -> posições dos bits (mesmo formato de dataset.posicoes)
+        self.dentro, self.fora = {}, {}
+        for k in range(estado.n_fixas, len(estado.dentro)):
+            self._por(self.dentro, estado.mascaras[estado.dentro[k]], k)
+        for k, i in enumerate(estado.fora):
+            self._por(self.fora, estado.mascaras[i], k)
+
+    def _por(self, classes, mascara, k):
+        if mascara not in classes:
+            classes[mascara] = set()
+            if mascara not in self.bits:
+                self.bits[mascara] = tuple(bits_de(mascara))
+        classes[mascara].add(k)
+
+    def _tirar(self, classes, mascara, k):
+        classes[mascara].discard(k)
+        if not classes[mascara]:
+            del classes[mascara]
+
+    def trocar(self, k_dentro, k_fora):
+        mascaras = self.estado.mascaras
+        m_rem, m_add = mascaras[self.estado.dentro[k_dentro]], mascaras[self.estado.fora[k_fora]]
+        self._tirar(self.dentro, m_rem, k_dentro)
+        self._tirar(self.fora, m_add, k_fora)
+        self.estado.trocar(k_dentro, k_fora)
+        self._por(self.dentro, m_add, k_dentro)
+        self._por(self.fora, m_rem, k_fora)
+
+    def _tabela_de_entradas(self, entradas, pesadas, padrao, tabelas):
+        # melhor_entrada[p]: menor custo de entrada, já com o desconto, para quem sai com o padrão de bits pesados p
+        mais, menos = tabelas
+        tamanho = 1 << len(pesadas)
+        melhor_entrada = [math.inf] * tamanho
+        qual = [None] * tamanho
+        for a, m_add, k_fora in entradas:
+            q = padrao(m_add)
+            if a < melhor_entrada[q]:
+                melhor_entrada[q], qual[q] = a, k_fora
+        # Troca, bit a bit, o padrão de quem entra pelo de quem sai: com o bit em ambos, desconta mais + menos
+        for t, j in enumerate(pesadas):
+            desconto = mais[j] + menos[j]
+            passo = 1 << t
+            for base in range(0, tamanho, 2 * passo):
+                for sem in range(base, base + passo):
+                    com = sem + passo
+                    v0, v1 = melhor_entrada[sem], melhor_entrada[com]
+                    k0, k1 = qual[sem], qual[com]
+                    if v1 < v0:
+                        melhor_entrada[sem], qual[sem] = v1, k1
+                    if v1 - desconto >= v0:
+                        melhor_entrada[com], qual[com] = v0, k0
+                    else:
+                        melhor_entrada[com] = v1 - desconto
+        return melhor_entrada, qual
+
+    def melhores(self, tabelas, limite, por_classe=False):
+        """Trocas (delta, k_dentro, k_fora) com delta < limite: só a melhor de todas, ou a melhor de cada máscara de dentro.
+
+        delta = custo de saída + custo de entrada - desconto dos bits em comum, e o desconto só existe nas
+        características que estão na meta ("pesadas"). Para cada padrão de bits pesados de quem sai, a melhor
+        entrada sai de uma programação dinâmica sobre esses bits, em vez de testar todos os pares.
+        """
+        mais, menos = tabelas
+        criticas = self.estado.criticas
+        pesadas = [j for j in range(len(mais)) if mais[j] + menos[j] > 1e-9]
+        padroes = {}
+
+        def padrao(mascara):
+            # Bits pesados da máscara renumerados 0..len(pesadas)-1
+            if mascara not in padroes:
+                padroes[mascara] = sum(1 << t for t, j in enumerate(pesadas) if (mascara >> j) & 1)
+            return padroes[mascara]
+
+        entradas = [(sum(map(mais.__getitem__, self.bits[m_add])), m_add, next(iter(ks))) for m_add, ks in self.fora.items()]
+        # Com poucas máscaras distintas (bases pequenas) testar todos os pares sai mais barato que a tabela
+        direto = len(self.dentro) * len(entradas) <= (1 << len(pesadas)) * len(pesadas)
+        if not direto:
+            melhor_entrada, qual = self._tabela_de_entradas(entradas, pesadas, padrao, tabelas)
+
+        achadas = []
+        teto = limite
+        for m_rem, ks in self.dentro.items():
+            r = sum(map(menos.__getitem__, self.bits[m_rem]))
+            k_dentro = next(iter(ks))
+            proibidas = m_rem & criticas
+            if not proibidas and not direto:
+                delta, k_fora = r + melhor_entrada[padrao(m_rem)], qual[padrao(m_rem)]
+            else:
+                # Par a par; uma única portadora de característica individual (são poucas) só sai se quem entra também a tem
+                delta, k_fora = math.inf, None
+                for a, m_add, k in entradas:
+                    if proibidas & ~m_add:
+                        continue
+                    d = r + a
+                    for j in bits_de(m_rem & m_add):
+                        d -= mais[j] + menos[j]
+                    if d < delta:
+                        delta, k_fora = d, k
+            if k_fora is not None and delta < teto:
+                achadas.append((delta, k_dentro, k_fora))
+                if not por_classe:
+                    teto = delta
+        achadas.sort()
+        return achadas if por_classe else achadas[:1]
+
+def polir(estado, alvos, total_aves, primeiras=None, parar=None):
+    """Melhor troca simples até não melhorar mais; depois tenta pares de trocas. Devolve quantas trocas fez.
+
+    Para ao entrar na tolerância quando o estado vigia as faixas, ou quando `parar` ligar.
+    """
+    primeiras = primeiras or SA_POLIMENTO_PRIMEIRAS
+    classes = ClassesDeTroca(estado)
+    trocas = 0
+    while estado.faixas is None or estado.fora_da_faixa > 0:
+        if parar is not None and parar.is_set():
+            break
+        tabelas = tabelas_delta(estado.contagens, alvos, total_aves)
+        simples = classes.melhores(tabelas, -1e-9)
+        if simples:
+            classes.trocar(simples[0][1], simples[0][2])
+            trocas += 1
+            continue
+        # Ótimo local para uma troca: uma primeira troca que piora pode abrir uma segunda que compense
+        for delta1, k_dentro, k_fora in classes.melhores(tabelas, math.inf, por_classe=True)[:primeiras]:
+            classes.trocar(k_dentro, k_fora)
+            segunda = classes.melhores(tabelas_delta(estado.contagens, alvos, total_aves), -delta1 - 1e-9)
+            if segunda:
+                classes.trocar(segunda[0][1], segunda[0][2])
+                trocas += 2
+                break
+            classes.trocar(k_dentro, k_fora)
+        else:
+            break
+    return trocas
+
+# ==== VÁRIAS CADEIAS EM PARALELO (uma por processo) ====
+_dataset_worker = None
+_parada_worker = None
+
+def _iniciar_worker(dataset, parada):
+    global _dataset_worker, _parada_worker
+    _dataset_worker = dataset
+    _parada_worker = parada
+
+def _rodar_cadeia(proporcoes_alvo_caracteristica, tolerancia, total_aves, must_include, semente, lote, criterio, max_iteracoes):
+    resultado = recozer(_dataset_worker, proporcoes_alvo_caracteristica, tolerancia, total_aves, must_include, semente, _parada_worker,
+                        lote, criterio, max_iteracoes)
+    if resultado is not None and resultado["sucesso"]:
+        _parada_worker.set()
+    return resultado
+
+def melhor_resultado(resultados):
+    validos = [r for r in resultados if r is not None]
+    if not validos:
+        return None
+    return min(validos, key=lambda r: (not r["sucesso"], r["energia"]))
+
+def recozer_paralelo(dataset, proporcoes_alvo_caracteristica, tolerancia, total_aves, must_include, n_cadeias=None, semente=None,
+                     lote=None, criterio=None, max_iteracoes=None, parar=None, ao_melhorar=None):
+    # Cadeias independentes com sementes diferentes; a primeira que acertar a tolerância para todas as outras.
+    # As cadeias rodam em outros processos: ao_melhorar só fica sabendo do melhor de cada uma quando ela termina.
+    inicio = time.perf_counter()
+    n_cadeias = n_cadeias or os.cpu_count() or 1
+    base = semente if semente is not None else random.randrange(2**32)
+    sementes = [base + k for k in range(n_cadeias)]
+
+    contexto = multiprocessing.get_context()
+    parada = contexto.Event()
+    with ProcessPoolExecutor(
+        max_workers=min(n_cadeias, os.cpu_count() or 1),
+        mp_context=contexto,
+        initializer=_iniciar_worker,
+        initargs=(dataset, parada),
+    ) as pool:
+        futuros = [
+            pool.submit(_rodar_cadeia, proporcoes_alvo_caracteristica, tolerancia, total_aves, must_include, s, lote, criterio,
+                        max_iteracoes)
+            for s in sementes
+        ]
+        # Um pedido de parada de fora (parar) é repassado às cadeias pelo evento compartilhado
+        pendentes = set(futuros)
+        anunciado = None
+        while pendentes:
+            prontos, pendentes = wait(pendentes, timeout=0.2)
+            if parar is not None and parar.is_set():
+                parada.set()
+            if ao_melhorar is not None and prontos:
+                melhor = melhor_resultado([f.result() for f in prontos] + [anunciado])
+                if melhor is not None and melhor is not anunciado:
+                    anunciado = melhor
+                    ao_melhorar(melhor["baralho"], melhor["energia"], time.perf_counter() - inicio)
+        resultados = [f.result() for f in futuros]
+    return melhor_resultado(resultados), resultados
+
+# ==== TROCA DE RÉPLICAS (parallel tempering) ====
+def _rodar_replica(dataset, proporcoes_alvo_caracteristica, faixas, total_aves, must_include, baralho, T, passos, semente):
+    # Metropolis a temperatura fixa; devolve o estado atual e o melhor baralho visto nesta rodada.
+    # faixas vem de faixas_permitidas (None quando nenhuma contagem atende à tolerância).
+    rng = random.Random(semente)
+    mascaras = dataset.mascaras
+    alvos = alvos_por_bit(dataset, proporcoes_alvo_caracteristica)
+    individuais = dataset.mascara_individuais
+
+    estado = EstadoBaralho(dataset, baralho, must_include)
+    if faixas is not None:
+        estado.vigiar_faixas(faixas)
+    energia = energia_por_contagens(estado.contagens, alvos, individuais, total_aves)
+    melhor, melhor_e = list(estado.dentro), energia
+    aceitas, feitos = 0, 0
+    sucesso = faixas is not None and estado.fora_da_faixa == 0
+
+    while not sucesso and feitos < passos:
+        troca = gerar_vizinho(estado, rng)
+        if troca is None:
+            break
+        feitos += 1
+        k_dentro, k_fora = troca
+        m_rem, m_add = mascaras[estado.dentro[k_dentro]], mascaras[estado.fora[k_fora]]
+        delta = calcular_delta_energia(estado.contagens, m_rem, m_add, alvos, individuais, total_aves)
+        if delta < 0 or rng.random() < math.exp(-delta / T):
+            estado.trocar(k_dentro, k_fora)
+            energia = energia_por_contagens(estado.contagens, alvos, individuais, total_aves)
+            aceitas += 1
+            if faixas is not None and estado.fora_da_faixa == 0:
+                melhor, melhor_e = list(estado.dentro), energia
+                sucesso = True
+            elif energia < melhor_e:
+                melhor, melhor_e = list(estado.dentro), energia
+
+    return {
+        "baralho": list(estado.dentro),
+        "energia": energia,
+        "melhor": melhor,
+        "melhor_e": melhor_e,
+        "aceitas": aceitas,
+        "passos": feitos,
+        "sucesso": sucesso,
+    }
+
+def _rodar_replica_worker(*args):
+    return _rodar_replica(_dataset_worker, *args)
+
+def trocar_replicas(dataset, proporcoes_alvo_caracteristica, tolerancia, total_aves, must_include,
+                    temperaturas=None, rodadas=None, passos_por_rodada=None, n_processos=1, semente=None, inicializador=None,
+                    parar=None, ao_melhorar=None):
+    # Uma réplica por temperatura fixa; entre rodadas, vizinhas na escada trocam de estado (critério de Metropolis).
+    inicio = time.perf_counter()
+    temperaturas = sorted(temperaturas or PT_TEMPERATURAS)
+    rodadas = rodadas or PT_RODADAS
+    passos_por_rodada = passos_por_rodada or PT_PASSOS_POR_RODADA
+    rng = random.Random(semente)
+    faixas = faixas_permitidas(dataset, proporcoes_alvo_caracteristica, tolerancia, total_aves) if total_aves > 0 else None
+
+    replicas = []
+    for _ in temperaturas:
+        if replicas and parar is not None and parar.is_set():
+            # Sem tempo para construir um baralho por réplica: as que faltam partem do primeiro
+            baralho = list(replicas[0]["baralho"])
+        else:
+            baralho = baralho_inicial(dataset, total_aves, proporcoes_alvo_caracteristica, must_include, rng, inicializador)
+        if baralho is None:
+            return None
+        replicas.append({"baralho": baralho, "energia": calcular_energia(dataset, baralho, proporcoes_alvo_caracteristica, total_aves)})
+
+    n = len(temperaturas)
+    tentativas_troca, aceitas_troca = [0] * (n - 1), [0] * (n - 1)
+    passos_mov, aceitas_mov = [0] * n, [0] * n
+    # Uma réplica que já nasce dentro da tolerância é a resposta, mesmo que a parada venha antes da primeira rodada
+    iniciais = [rep for rep in replicas if faixas is not None and
+                verificar_resultado_final(dataset, rep["baralho"], proporcoes_alvo_caracteristica, tolerancia)]
+    sucesso = bool(iniciais)
+    melhor = min(iniciais or replicas, key=lambda r: r["energia"])
+    melhor, melhor_e = list(melhor["baralho"]), melhor["energia"]
+    energia_inicial = min(rep["energia"] for rep in replicas)
+    rodada = 0
+    if ao_melhorar is not None:
+        ao_melhorar(melhor, melhor_e, time.perf_counter() - inicio)
+
+    pool = None
+    if n_processos > 1:
+        pool = ProcessPoolExecutor(max_workers=n_processos, initializer=_iniciar_worker, initargs=(dataset, None))
+    try:
+        while rodada < rodadas and not sucesso:
+            if parar is not None and parar.is_set():
+                break
+            tarefas = [
+                (proporcoes_alvo_caracteristica, faixas, total_aves, must_include,
+                 rep["baralho"], T, passos_por_rodada, rng.randrange(2**32))
+                for rep, T in zip(replicas, temperaturas)
+            ]
+            if pool is not None:
+                replicas = list(pool.map(_rodar_replica_worker, *zip(*tarefas)))
+            else:
+                replicas = [_rodar_replica(dataset, *t) for t in tarefas]
+            rodada += 1
+
+            anterior = melhor
+            for k, rep in enumerate(replicas):
+                passos_mov[k] += rep["passos"]
+                aceitas_mov[k] += rep["aceitas"]
+                # Um baralho dentro da tolerância vale mais que um de energia menor fora dela
+                if (rep["sucesso"] and not sucesso) or (rep["sucesso"] == sucesso and rep["melhor_e"] < melhor_e):
+                    melhor, melhor_e = rep["melhor"], rep["melhor_e"]
+                    sucesso = sucesso or rep["sucesso"]
+            if ao_melhorar is not None and melhor is not anterior:
+                ao_melhorar(melhor, melhor_e, time.perf_counter() - inicio)
+            if sucesso:
+                break
+            if not any(rep["passos"] for rep in replicas):
+                break  # nenhuma réplica conseguiu trocar (ex.: baralho = base inteira): as próximas rodadas também não
+
+            # Alterna pares (0,1),(2,3)... e (1,2),(3,4)... entre as rodadas
+            for k in range(rodada % 2, n - 1, 2):
+                tentativas_troca[k] += 1
+                arg = (1 / temperaturas[k] - 1 / temperaturas[k + 1]) * (replicas[k]["energia"] - replicas[k + 1]["energia"])
+                if arg >= 0 or rng.random() < math.exp(arg):
+                    replicas[k], replicas[k + 1] = replicas[k + 1], replicas[k]
+                    aceitas_troca[k] += 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    assert sucesso == verificar_resultado_final(dataset, melhor, proporcoes_alvo_caracteristica, tolerancia)
+
+    return {
+        "baralho": melhor,
+        "energia": melhor_e,
+        "sucesso": sucesso,
+        "iteracoes": sum(passos_mov),
+        "semente": semente,
+        "rodadas": rodada,
+        "energia_inicial": energia_inicial,
+        "temperaturas": temperaturas,
+        "aceitacao_movimentos": [a / p if p else 0.0 for a, p in zip(aceitas_mov, passos_mov)],
+        "trocas": [
+            {
+                "t_fria": temperaturas[k],
+                "t_quente": temperaturas[k + 1],
+                "tentativas": tentativas_troca[k],
+                "aceitas": aceitas_troca[k],
+                "taxa": aceitas_troca[k] / tentativas_troca[k] if tentativas_troca[k] else 0.0,
+            }
+            for k in range(n - 1)
+        ],
+    }
+
+# ==== BUSCA TABU (melhor troca não proibida de uma vizinhança sorteada) ====
+def busca_tabu(dataset, proporcoes_alvo_caracteristica, tolerancia, total_aves, must_include, semente=None,
+               max_iteracoes=None, vizinhanca=None, posse=None, inicializador=None, parar=None, ao_melhorar=None):
+    # Uma ave que troca de lado fica proibida de trocar de novo por `posse` iterações, salvo se a troca bater o melhor baralho.
+    inicio = time.perf_counter()
+    rng = random.Random(semente)
+    max_iteracoes = max_iteracoes or TABU_ITERACOES
+    vizinhanca = vizinhanca or TABU_VIZINHANCA
+    posse = posse or TABU_POSSE
+    bar_inicial = baralho_inicial(dataset, total_aves, proporcoes_alvo_caracteristica, must_include, rng, inicializador)
+    if bar_inicial is None:
+        return None
+
+    mascaras, posicoes = dataset.mascaras, dataset.posicoes
+    alvos = alvos_por_bit(dataset, proporcoes_alvo_caracteristica)
+    individuais = dataset.mascara_individuais
+    metas = metas_por_bit(alvos, total_aves)
+
+    estado = EstadoBaralho(dataset, bar_inicial, must_include)
+    faixas = faixas_permitidas(dataset, proporcoes_alvo_caracteristica, tolerancia, total_aves) if total_aves > 0 else None
+    if faixas is not None:
+        estado.vigiar_faixas(faixas)
+    energia_atual = energia_por_contagens(estado.contagens, alvos, individuais, total_aves)
+    energia_inicial = energia_atual
+    melhor, melhor_e = list(estado.dentro), energia_atual
+    sucesso = faixas is not None and estado.fora_da_faixa == 0
+    if ao_melhorar is not None:
+        ao_melhorar(melhor, melhor_e, time.perf_counter() - inicio)
+
+    proibida_ate = [0] * len(dataset)  # última iteração em que a ave ainda não pode trocar de lado
+    iteracoes = avaliacoes = aspiracoes = ultima_melhora = 0
+    # Baralho só de obrigatórias, ou sem ninguém de fora para entrar: nenhuma troca é possível
+    sem_trocas = len(estado.dentro) == estado.n_fixas or not estado.fora
+    while not sucesso and not sem_trocas and iteracoes < max_iteracoes:
+        if parar is not None and iteracoes % TABU_INTERVALO_PARADA == 0 and parar.is_set():
+            break
+        iteracoes += 1
+        tabelas = tabelas_delta(estado.contagens, alvos, total_aves)
+        escolha = None
+        for _ in range(vizinhanca):
+            troca = gerar_vizinho_guiado(estado, metas, rng) if rng.random() < SA_PROPOSTA_GUIADA else gerar_vizinho(estado, rng)
+            if troca is None:
+                continue
+            avaliacoes += 1
+            removida, adicionada = estado.dentro[troca[0]], estado.fora[troca[1]]
+            delta = delta_por_tabelas(tabelas, posicoes, mascaras, removida, adicionada)
+            proibida = proibida_ate[removida] >= iteracoes or proibida_ate[adicionada] >= iteracoes
+            # Aspiração: a troca proibida só vale se levar a um baralho melhor que o melhor já visto
+            if proibida and energia_atual + delta >= melhor_e:
+                continue
+            if escolha is None or delta < escolha[2]:
+                escolha = (troca[0], troca[1], delta, proibida)
+        if escolha is None:
+            # Nenhuma troca permitida nesta vizinhança: também conta como iteração sem melhora
+            if TABU_JANELA_ESTAGNACAO is not None and iteracoes - ultima_melhora >= TABU_JANELA_ESTAGNACAO:
+                break
+            continue
+
+        k_dentro, k_fora, _, proibida = escolha
+        aspiracoes += proibida
+        proibida_ate[estado.dentro[k_dentro]] = proibida_ate[estado.fora[k_fora]] = iteracoes + posse
+        estado.trocar(k_dentro, k_fora)
+        energia_atual = energia_por_contagens(estado.contagens, alvos, individuais, total_aves)
+        if faixas is not None and estado.fora_da_faixa == 0:
+            melhor, melhor_e = list(estado.dentro), energia_atual
+            sucesso = True
+        elif energia_atual < melhor_e:
+            melhor, melhor_e = list(estado.dentro), energia_atual
+            ultima_melhora = iteracoes
+        elif TABU_JANELA_ESTAGNACAO is not None and iteracoes - ultima_melhora >= TABU_JANELA_ESTAGNACAO:
+            break
+        else:
+            continue
+        if ao_melhorar is not None:
+            ao_melhorar(melhor, melhor_e, time.perf_counter() - inicio)
+
+    assert sucesso == verificar_resultado_final(dataset, melhor, proporcoes_alvo_caracteristica, tolerancia)
+    return {
+        "baralho": melhor,
+        "energia": melhor_e,
+        "sucesso": sucesso,
+        "iteracoes": iteracoes,
+        "avaliacoes": avaliacoes,
+        "energia_inicial": energia_inicial,
+        "aspiracoes": aspiracoes,
+        "semente": semente,
+    }
+
+# ==== BUSCA EXATA (branch-and-bound sobre classes de aves iguais) ====
+def soma_extremos(histograma, quantidade, reverso):
+    # Soma dos `quantidade` maiores (reverso=True) ou menores pesos, com histograma[w] itens de peso w
+    soma = 0
+    pesos = range(len(histograma) - 1, -1, -1) if reverso else range(len(histograma))
+    for w in pesos:
+        pega = min(quantidade, histograma[w])
+        soma += pega * w
+        quantidade -= pega
+        if quantidade == 0:
+            break
+    return soma
+
+def busca_exata(dataset, proporcoes_alvo_caracteristica, tolerancia, total_aves, must_include,
+                limite_segundos=None, parar_no_primeiro=False, ao_melhorar=None, limite_nos=None, parar=None):
+    # Aves com a mesma máscara são intercambiáveis: decide quantas levar de cada classe.
+    # Termina com status "otimo" (prova de menor energia), "inviavel" (prova de que não existe),
+    # "viavel" ou "desconhecido" (tempo esgotado com ou sem baralho).
+    inicio = time.perf_counter()
+    limite = EXATO_LIMITE_SEGUNDOS if limite_segundos is None else limite_segundos
+    fixas = list(dict.fromkeys(must_include))
+    vagas = total_aves - len(fixas)
+    faixas = faixas_permitidas(dataset, proporcoes_alvo_caracteristica, tolerancia, total_aves) if total_aves > 0 else None
+
+    melhor, melhor_e = None, float('inf')
+    nos = 0
+    esgotou = True
+
+    if faixas is not None and vagas >= 0:
+        n_carac = len(dataset.colunas)
+        alvos = alvos_por_bit(dataset, proporcoes_alvo_caracteristica)
+        metas = [None if d is None else d * total_aves / 100 for d in alvos]
+        individuais = dataset.mascara_individuais
+
+        fixas_set = set(fixas)
+        por_mascara = {}
+        for i, mascara in enumerate(dataset.mascaras):
+            if i not in fixas_set:
+                por_mascara.setdefault(mascara, []).append(i)
+        no_pool = [0] * n_carac
+        for mascara, ids in por_mascara.items():
+            for j in bits_de(mascara):
+                no_pool[j] += len(ids)
+        # Classes com as características mais raras primeiro: são as que mais restringem
+        classes = sorted(por_mascara.items(), key=lambda kv: (min((no_pool[j] for j in bits_de(kv[0])), default=len(dataset)), -len(kv[1])))
+        n_classes = len(classes)
+        posicoes = [tuple(bits_de(mascara)) for mascara, _ in classes]
+        tamanhos = [len(ids) for _, ids in classes]
+
+        # Quantas aves (com cada característica) ainda existem da classe i em diante
+        restantes = [[0] * n_carac for _ in range(n_classes + 1)]
+        total_restante = [0] * (n_classes + 1)
+        for i in range(n_classes - 1, -1, -1):
+            restantes[i] = list(restantes[i + 1])
+            for j in posicoes[i]:
+                restantes[i][j] += tamanhos[i]
+            total_restante[i] = total_restante[i + 1] + tamanhos[i]
+
+        # Por grupo: quantas aves restantes têm exatamente w características do grupo
+        grupos = [dataset.mascara_de(ids) for ids in GRUPOS.values()]
+        bits_grupos = [tuple(bits_de(g)) for g in grupos]
+        histogramas = [[[0] * (len(b) + 1) for b in bits_grupos] for _ in range(n_classes + 1)]
+        for i in range(n_classes - 1, -1, -1):
+            for g, grupo in enumerate(grupos):
+                histogramas[i][g] = list(histogramas[i + 1][g])
+                histogramas[i][g][bin(classes[i][0] & grupo).count("1")] += tamanhos[i]
+
+        contagens = contar_caracteristicas(dataset, fixas)
+        escolha = [0] * n_classes
+
+        def limite_inferior(i, vagas):
+            # Energia mínima alcançável a partir daqui; None se alguma faixa já não pode ser atendida
+            if total_restante[i] < vagas:
+                return None
+            lb = 0.0
+            rest = restantes[i]
+            for j in range(n_carac):
+                c = contagens[j]
+                com = rest[j]
+                lo = c + max(0, vagas - (total_restante[i] - com))
+                hi = c + min(com, vagas)
+                minimo, maximo = faixas[j]
+                lo, hi = max(lo, minimo), min(hi, maximo)
+                if lo > hi:
+                    return None
+                meta = metas[j]
+                if meta is not None:
+                    if meta < lo:
+                        lb += lo - meta
+                    elif meta > hi:
+                        lb += meta - hi
+            # As vagas restantes só conseguem somar entre (as vagas com menos) e (as vagas com mais) marcas de cada grupo
+            for g, bits in enumerate(bits_grupos):
+                falta = sobra = 0
+                for j in bits:
+                    minimo, maximo = faixas[j]
+                    falta += max(0, minimo - contagens[j])
+                    sobra += maximo - contagens[j]
+                hist = histogramas[i][g]
+                if falta > soma_extremos(hist, vagas, reverso=True) or sobra < soma_extremos(hist, vagas, reverso=False):
+                    return None
+            return lb * 100 / total_aves
+
+        def valores(i, vagas):
+            maximo = min(tamanhos[i], vagas)
+            for j in posicoes[i]:
+                maximo = min(maximo, faixas[j][1] - contagens[j])
+            if maximo < 0:
+                return []
+            esperado = tamanhos[i] * vagas / total_restante[i]
+            fator = 1.0
+            for j in posicoes[i]:
+                if metas[j] is not None:
+                    oferta = restantes[i][j] * vagas / total_restante[i]
+                    fator *= min(10.0, max(0.0, metas[j] - contagens[j]) / oferta) if oferta > 0 else 1.0
+            preferido = min(maximo, max(0, round(esperado * fator)))
+            ordem = [preferido]
+            for passo in range(1, maximo + 1):
+                if preferido + passo <= maximo:
+                    ordem.append(preferido + passo)
+                if preferido - passo >= 0:
+                    ordem.append(preferido - passo)
+            return ordem
+
+        def aplicar(i, v):
+            for j in posicoes[i]:
+                contagens[j] += v
+            escolha[i] += v
+
+        pilha = []
+        i = 0
+        while True:
+            nos += 1
+            if nos % EXATO_INTERVALO_RELOGIO == 0 and (time.perf_counter() - inicio > limite or
+                                                        (parar is not None and parar.is_set())):
+                esgotou = False
+                break
+            if limite_nos is not None and nos > limite_nos:
+                esgotou = False
+                break
+            lb = limite_inferior(i, vagas)
+            if lb is not None and lb < melhor_e - 1e-9:
+                if vagas == 0:
+                    energia = energia_por_contagens(contagens, alvos, individuais, total_aves)
+                    if energia < melhor_e:
+                        melhor_e = energia
+                        melhor = list(fixas)
+                        for k, v in enumerate(escolha):
+                            melhor.extend(classes[k][1][:v])
+                        if ao_melhorar is not None:
+                            ao_melhorar(melhor, melhor_e, time.perf_counter() - inicio)
+                        if parar_no_primeiro:
+                            esgotou = False
+                            break
+                else:
+                    pilha.append([i, valores(i, vagas), 0])
+            # Próximo valor da classe no topo da pilha (desfazendo o anterior)
+            while pilha:
+                topo = pilha[-1]
+                k, ordem, p = topo
+                if p > 0:
+                    vagas += ordem[p - 1]
+                    aplicar(k, -ordem[p - 1])
+                if p < len(ordem):
+                    topo[2] = p + 1
+                    vagas -= ordem[p]
+                    aplicar(k, ordem[p])
+                    i = k + 1
+                    break
+                pilha.pop()
+            else:
+                break
+
+    if melhor is not None:
+        status = "otimo" if esgotou else "viavel"
+    else:
+        status = "inviavel" if esgotou else "desconhecido"
+    return {
+        "baralho": melhor,
+        "energia": melhor_e,
+        "sucesso": melhor is not None,
+        "status": status,
+        "nos": nos,
+        "iteracoes": nos,
+        "segundos": time.perf_counter() - inicio,
+    }
+
+def rodar_motor(dataset, motor, proporcoes_alvo_caracteristica, tolerancia, total_aves, must_include,
+                semente=None, n_cadeias=1, ao_melhorar=None, orcamento=None, parar=None, rastro=None, salvar_em=None):
+    # orcamento: iterações do recozimento ou da busca tabu, passos somados das réplicas ou nós da busca exata.
+    # parar: evento (threading ou multiprocessing) que, quando ligado, encerra o motor com o melhor baralho até ali.
+    # ao_melhorar(baralho, energia, segundos): chamada a cada novo melhor baralho (na busca exata, só os viáveis).
+    # rastro e salvar_em: só o recozimento de uma cadeia usa (as outras buscas não têm temperatura nem laço único).
+    if motor == "exato":
+        return busca_exata(dataset, proporcoes_alvo_caracteristica, tolerancia, total_aves, must_include,
+                           ao_melhorar=ao_melhorar, limite_nos=orcamento, parar=parar)
+    if motor == "replicas":
+        n_processos = min(len(PT_TEMPERATURAS), os.cpu_count() or 1)
+        rodadas = None
+        if orcamento:
+            rodadas = max(1, math.ceil(orcamento / (len(PT_TEMPERATURAS) * PT_PASSOS_POR_RODADA)))
+        return trocar_replicas(dataset, proporcoes_alvo_caracteristica, tolerancia, total_aves, must_include,
+                               rodadas=rodadas, n_processos=n_processos, semente=semente, parar=parar,
+                               ao_melhorar=ao_melhorar)
+    if motor == "tabu":
+        return busca_tabu(dataset, proporcoes_alvo_caracteristica, tolerancia, total_aves, must_include, semente,
+                          max_iteracoes=orcamento, parar=parar, ao_melhorar=ao_melhorar)
+    if motor != "recozimento":
+        raise ValueError(f"Motor desconhecido: {motor!r} (use {', '.join(MOTORES)})")
+    if n_cadeias > 1:
+        resultado, resultados = recozer_paralelo(dataset, proporcoes_alvo_caracteristica, tolerancia, total_aves, must_include,
+                                                 n_cadeias, semente, max_iteracoes=orcamento, parar=parar,
+                                                 ao_melhorar=ao_melhorar)
+        if resultado is not None:
+            resultado["cadeias"] = resultados
+        return resultado
+    return recozer(dataset, proporcoes_alvo_caracteristica, tolerancia, total_aves, must_include, semente, parar,
+                   max_iteracoes=orcamento, ao_melhorar=ao_melhorar, rastro=rastro, salvar_em=salvar_em)
+
+# ==== API (para usar o gerador a partir de outro programa) ====
+class Resultado:
+    """O que solve() devolve: só dados, sem nenhuma impressão."""
+
+    def __init__(self, motor, baralho, energia, sucesso, iteracoes, segundos, proporcoes, semente=None, status=None, detalhes=None):
+        self.motor = motor
+        self.baralho = baralho  # ids das aves (linhas do Dataset)
+        self.energia = energia
+        self.sucesso = sucesso
+        self.iteracoes = iteracoes
+        self.segundos = segundos
+        self.proporcoes = proporcoes  # {coluna: % obtida no baralho}
+        self.semente = semente
+        self.status = status  # só a busca exata preenche: otimo, viavel, inviavel, desconhecido
+        self.detalhes = detalhes or {}  # estatísticas próprias de cada motor (cadeias, trocas, ...)
+
+    def __repr__(self):
+        return (f"Resultado(motor={self.motor!r}, sucesso={self.sucesso}, energia={self.energia:.3f}, "
+                f"aves={len(self.baralho)}, iteracoes={self.iteracoes})")
+
+    def como_dict(self, dataset=None):
+        dados = {
+            "motor": self.motor,
+            "sucesso": self.sucesso,
+            "status": self.status,
+            "energia": self.energia if math.isfinite(self.energia) else None,
+            "iteracoes": self.iteracoes,
+            "segundos": self.segundos,
+            "semente": self.semente,
+            "baralho": list(self.baralho),
+            "proporcoes": dict(self.proporcoes),
+        }
+        if dataset is not None:
+            dados["aves"] = [dataset.nomes[i] for i in self.baralho]
+        return dados
+
+def proporcoes_alvo(targets):
+    # {grupo: %} como nas perguntas do programa, ou {coluna: %} por característica
+    if targets and all(nome in GRUPOS for nome in targets):
+        faltando = [nome for nome in GRUPOS if nome not in targets]
+        if faltando:
+            raise ValueError(f"Faltam proporções para os grupos: {', '.join(faltando)}")
+        return proporcoes_por_caracteristica({nome: float(p) for nome, p in targets.items()})
+    try:
+        alvos = {int(col): float(p) for col, p in targets.items()}
+    except ValueError:
+        raise ValueError(f"Os alvos devem ser por grupo ({', '.join(GRUPOS)}) ou por número de coluna") from None
+    # A energia só olha as colunas com alvo, mas a verificação cobra todas as dos grupos: sem alvo, as duas discordam
+    faltando = [col for ids in GRUPOS.values() for col in ids if col not in alvos]
+    if faltando:
+        raise ValueError(f"Faltam proporções para as colunas: {', '.join(map(str, faltando))}")
+    return alvos
+
+def ids_de(dataset, must_include):
+    # Aceita ids de linha (int) e nomes de aves (str), misturados
+    nomes = [m for m in must_include if isinstance(m, str)]
+    ids = [m for m in must_include if not isinstance(m, str)]
+    for i in ids:
+        if not 0 <= i < len(dataset):
+            raise ValueError(f"Id de ave fora da base: {i}")
+    return list(dict.fromkeys(ids + ids_obrigatorios(dataset, nomes)))
+
+class Parada:
+    """Evento de parada de solve(): liga no fim do prazo, ao atingir a energia alvo ou quando `parar` (de fora) ligar."""
+
+    def __init__(self, parar=None, prazo_ms=None, energia_alvo=None):
+        self.parar = parar
+        self.limite = None if prazo_ms is None else time.perf_counter() + prazo_ms / 1000
+        self.energia_alvo = energia_alvo
+        self.motivo = None  # "prazo", "energia_alvo" ou "externa", depois que ligar
+
+    def melhorou(self, energia):
+        if self.energia_alvo is not None and energia <= self.energia_alvo and self.motivo is None:
+            self.motivo = "energia_alvo"
+
+    def is_set(self):
+        if self.motivo is None:
+            if self.limite is not None and time.perf_counter() >= self.limite:
+                self.motivo = "prazo"
+            elif self.parar is not None and self.parar.is_set():
+                self.motivo = "externa"
+        return self.motivo is not None
+
+def solve(dataset, targets, tolerance, size, must_include=(), seed=None, budget=None, motor="recozimento",
+          cadeias=1, ao_melhorar=None, parar=None, prazo_ms=None, energia_alvo=None, rastro=None, salvar_em=None):
+    # prazo_ms: tempo máximo em milissegundos; energia_alvo: basta um baralho com energia até esse valor.
+    # Nos dois casos o motor para e devolve o melhor baralho que tinha (detalhes["parada"] diz o motivo).
+    # Sem seed, uma semente é sorteada e fica em resultado.semente, para a execução poder ser repetida.
+    # salvar_em: arquivo de salvamento do recozimento de uma cadeia (veja retomar()).
+    inicio = time.perf_counter()
+    if seed is None:
+        seed = random.randrange(2**32)
+    proporcoes_alvo_caracteristica = proporcoes_alvo(targets)
+    must = ids_de(dataset, must_include)
+    if size <= 0:
+        raise ValueError("O baralho precisa ter pelo menos uma ave")
+    if len(must) > size:
+        raise ValueError("A lista obrigatória contém mais aves do que o limite.")
+
+    parada = Parada(parar, prazo_ms, energia_alvo)
+
+    def anunciar(baralho, energia, segundos):
+        parada.melhorou(energia)
+        if ao_melhorar is not None:
+            ao_melhorar(baralho, energia, segundos)
+
+    bruto = rodar_motor(dataset, motor, proporcoes_alvo_caracteristica, tolerance, size, must,
+                        seed, cadeias, anunciar, budget, parada, rastro, salvar_em)
+    if bruto is None:
+        raise ValueError("Não foi possível inicializar o baralho.")
+    if parada.motivo is not None:
+        bruto["parada"] = parada.motivo
+    return montar_resultado(dataset, motor, bruto, seed, time.perf_counter() - inicio)
+
+def montar_resultado(dataset, motor, bruto, semente, segundos):
+    baralho = bruto["baralho"] or []
+    principais = ("baralho", "energia", "sucesso", "iteracoes", "semente", "status")
+    return Resultado(
+        motor=motor,
+        baralho=baralho,
+        energia=bruto["energia"],
+        sucesso=bruto["sucesso"],
+        iteracoes=bruto["iteracoes"],
+        segundos=segundos,
+        proporcoes={col: contar_proporcao(dataset, baralho, col) for col in dataset.colunas},
+        semente=semente,
+        status=bruto.get("status"),
+        detalhes={k: v for k, v in bruto.items() if k not in principais},
+    )
+
+def retomar(dataset, caminho, ao_melhorar=None, parar=None, rastro=None):
+    """Continua um recozimento de onde o arquivo de salvamento parou; o resultado é o mesmo da execução sem interrupção.
+
+    Os salvamentos seguem no mesmo arquivo.
+    """
+    inicio = time.perf_counter()
+    continuar = ler_salvamento_recozimento(caminho, dataset)
+    p = continuar["parametros"]
+    bruto = recozer(dataset, p["proporcoes_alvo_caracteristica"], p["tolerancia"], p["total_aves"], p["must_include"],
+                    p["semente"], parar, p["lote"], p["criterio"], p["max_iteracoes"], ao_melhorar=ao_melhorar,
+                    rastro=rastro, salvar_em=caminho, continuar=continuar)
+    return montar_resultado(dataset, "recozimento", bruto, p["semente"], time.perf_counter() - inicio)
+
+def melhorias(dataset, targets, tolerance, size, must_include=(), **opcoes):
+    """Gerador: roda solve() em segundo plano e entrega um Resultado a cada melhora; o último é o resultado final.
+
+    Aceita as mesmas opções de solve() (menos ao_melhorar e parar). Quem consome devagar recebe só a melhora mais
+    recente, e sair do laço antes do fim encerra a busca.
+    """
+    proporcoes_alvo_caracteristica = proporcoes_alvo(targets)
+    fila = queue.Queue()
+    parar = threading.Event()
+
+    def rodar():
+        try:
+            fila.put(("fim", solve(dataset, targets, tolerance, size, must_include, parar=parar,
+                                   ao_melhorar=lambda *melhora: fila.put(("melhora", melhora)), **opcoes)))
+        except Exception as e:
+            fila.put(("erro", e))
+
+    trabalhador = threading.Thread(target=rodar, daemon=True)
+    trabalhador.start()
+    try:
+        while True:
+            tipo, valor = fila.get()
+            while tipo == "melhora" and not fila.empty():
+                tipo, valor = fila.get()
+            if tipo == "erro":
+                raise valor
+            if tipo == "fim":
+                yield valor
+                return
+            baralho, energia, segundos = valor
+            yield Resultado(
+                motor=opcoes.get("motor", "recozimento"),
+                baralho=baralho,
+                energia=energia,
+                sucesso=verificar_resultado_final(dataset, baralho, proporcoes_alvo_caracteristica, tolerance),
+                iteracoes=None,
+                segundos=segundos,
+                proporcoes={col: contar_proporcao(dataset, baralho, col) for col in dataset.colunas},
+                semente=opcoes.get("seed"),
+            )
+    finally:
+        parar.set()
+        trabalhador.join()
@@ -0,0 +1,231 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from daniel_birds import carregar_dataset, solve
+
+# ==== CONFIGURAÇÃO DO SERVIDOR ====
+HOST = "127.0.0.1"  # só aceita conexões da própria máquina
+PORTA = 8765
+MAX_CORPO = 1 << 20  # tamanho máximo (bytes) do JSON de um pedido
+TTL_TERMINADOS = 600  # segundos que um job terminado fica disponível para consulta
+MAX_TERMINADOS = 200  # jobs terminados guardados ao mesmo tempo (os mais antigos são esquecidos antes)
+
+# ==== DENTRO DE CADA PROCESSO DO POOL (bases ficam carregadas entre um job e outro) ====
+_bases = {}
+
+def _base_residente(caminho):
+    # Recarrega só se o CSV mudou desde a última vez
+    versao = os.stat(caminho).st_mtime_ns
+    if caminho not in _bases or _bases[caminho][0] != versao:
+        _bases[caminho] = (versao, carregar_dataset(caminho))
+    return _bases[caminho][1]
+
+def _rodar_job(caminho, pedido, parar, comecou):
+    comecou.set()
+    if parar.is_set():
+        return None  # cancelado enquanto esperava na fila
+    dataset = _base_residente(caminho)
+    relogio = None
+    if pedido.get("segundos"):
+        # O prazo conta a partir do início do job, não do tempo na fila
+        relogio = threading.Timer(float(pedido["segundos"]), parar.set)
+        relogio.daemon = True
+        relogio.start()
+    try:
+        resultado = solve(
+            dataset,
+            pedido["proporcoes"],
+            float(pedido["tolerancia"]),
+            int(pedido["total_aves"]),
+            pedido.get("obrigatorias", []),
+            seed=pedido.get("semente"),
+            budget=pedido.get("orcamento"),
+            motor=pedido.get("motor", "recozimento"),
+            cadeias=int(pedido.get("cadeias", 1)),
+            parar=parar,
+            prazo_ms=pedido.get("prazo_ms"),
+            energia_alvo=pedido.get("energia_alvo"),
+        )
+    finally:
+        if relogio is not None:
+            relogio.cancel()
+    return resultado.como_dict(dataset)
+
+# ==== JOBS (no processo do servidor) ====
+class Trabalhos:
+    """Jobs enviados ao pool de processos, cada um com o seu evento de parada."""
+
+    def __init__(self, processos=None):
+        self.gerente = multiprocessing.Manager()  # eventos que atravessam processos
+        self.pool = ProcessPoolExecutor(max_workers=processos or os.cpu_count() or 1)
+        self.jobs = {}
+        self.ids = itertools.count(1)
+        self.trava = threading.Lock()
+
+    def enviar(self, pedido):
+        if not isinstance(pedido, dict):
+            raise ValueError("O pedido deve ser um objeto JSON")
+        for campo in ("csv", "proporcoes", "tolerancia", "total_aves"):
+            if campo not in pedido:
+                raise ValueError(f"Falta o campo {campo!r}")
+        caminho = os.path.abspath(pedido["csv"])
+        if not os.path.isfile(caminho):
+            raise ValueError(f"Arquivo não encontrado: {pedido['csv']}")
+        parar, comecou = self.gerente.Event(), self.gerente.Event()
+        with self.trava:
+            self._limpar()
+            job_id = str(next(self.ids))
+            job = self.jobs[job_id] = {
+                "futuro": self.pool.submit(_rodar_job, caminho, pedido, parar, comecou),
+                "parar": parar,
+                "comecou": comecou,
+                "cancelado": False,
+                "criado": time.time(),
+                "terminado": None,
+                "nome": pedido.get("nome"),
+            }
+        job["futuro"].add_done_callback(lambda _: job.update(terminado=time.time()))
+        return self.estado(job_id)
+
+    def _limpar(self):
+        # Esquece os jobs terminados há mais de TTL_TERMINADOS e os mais antigos além de MAX_TERMINADOS,
+        # com o resultado e os eventos do gerente (chamar com a trava)
+        agora = time.time()
+        terminados = sorted((job["terminado"], job_id) for job_id, job in self.jobs.items() if job["terminado"] is not None)
+        excesso = len(terminados) - MAX_TERMINADOS
+        for k, (quando, job_id) in enumerate(terminados):
+            if k < excesso or agora - quando > TTL_TERMINADOS:
+                del self.jobs[job_id]
+
+    def estado(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        futuro = job["futuro"]
+        dados = {"id": job_id, "nome": job["nome"], "criado": job["criado"]}
+        if futuro.cancelled():
+            dados["estado"] = "cancelado"
+        elif futuro.done():
+            erro = futuro.exception()
+            if erro is not None:
+                dados["estado"] = "erro"
+                dados["erro"] = str(erro)
+            else:
+                # Cancelado no meio do caminho: o resultado é o melhor baralho até a parada
+                dados["estado"] = "cancelado" if job["cancelado"] else "concluido"
+                if futuro.result() is not None:
+                    dados["resultado"] = futuro.result()
+        else:
+            # O pool já entrega ao processo alguns jobs da fila; só conta como rodando o que de fato começou
+            dados["estado"] = "rodando" if job["comecou"].is_set() else "na_fila"
+        return dados
+
+    def listar(self):
+        with self.trava:
+            self._limpar()
+            ids = list(self.jobs)
+        estados = (self.estado(job_id) for job_id in ids)
+        return [{k: v for k, v in dados.items() if k != "resultado"} for dados in estados if dados is not None]
+
+    def cancelar(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if not job["futuro"].done():
+            job["cancelado"] = True
+            if not job["futuro"].cancel():
+                job["parar"].set()
+        return self.estado(job_id)
+
+    def fechar(self):
+        for job in list(self.jobs.values()):
+            job["futuro"].cancel()
+            job["parar"].set()
+        self.pool.shutdown(wait=True)
+        self.gerente.shutdown()
+
+# ==== HTTP ====
+class Atendente(BaseHTTPRequestHandler):
+    """POST /jobs, GET /jobs, GET /jobs/<id> e DELETE /jobs/<id>, tudo em JSON."""
+
+    trabalhos = None
+    silencioso = False
+
+    def _responder(self, codigo, dados):
+        corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _job_id(self):
+        partes = self.path.rstrip("/").split("/")
+        return partes[2] if len(partes) == 3 and partes[1] == "jobs" else None
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self._responder(404, {"erro": "Caminho desconhecido"})
+        try:
+            cabecalho = self.headers.get("Content-Length") or "0"
+            if not cabecalho.strip().isdigit():
+                raise ValueError("Content-Length inválido")  # negativo faria o read() esperar o cliente fechar
+            tamanho = int(cabecalho)
+            if tamanho > MAX_CORPO:
+                return self._responder(413, {"erro": "Pedido grande demais"})
+            pedido = json.loads(self.rfile.read(tamanho) or b"{}")
+            self._responder(202, self.trabalhos.enviar(pedido))
+        except ValueError as e:
+            self._responder(400, {"erro": str(e)})
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/jobs":
+            return self._responder(200, self.trabalhos.listar())
+        dados = self.trabalhos.estado(self._job_id())
+        if dados is None:
+            return self._responder(404, {"erro": "Job não encontrado"})
+        self._responder(200, dados)
+
+    def do_DELETE(self):
+        dados = self.trabalhos.cancelar(self._job_id())
+        if dados is None:
+            return self._responder(404, {"erro": "Job não encontrado"})
+        self._responder(200, dados)
+
+    def log_message(self, formato, *args):
+        if not self.silencioso:
+            super().log_message(formato, *args)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor local (HTTP/JSON) de geração de baralhos")
+    parser.add_argument("--porta", type=int, default=PORTA)
+    parser.add_argument("--processos", type=int, default=None, help="jobs rodando ao mesmo tempo (padrão: núcleos da CPU)")
+    parser.add_argument("--silencioso", action="store_true", help="não registra cada pedido na tela")
+    args = parser.parse_args(argv)
+
+    # A porta primeiro: se estiver ocupada, o gerente e o pool nem chegam a subir
+    servidor = ThreadingHTTPServer((HOST, args.porta), Atendente)
+    trabalhos = None
+    try:
+        trabalhos = Trabalhos(args.processos)
+        Atendente.trabalhos = trabalhos
+        Atendente.silencioso = args.silencioso
+        print(f"🐦 Servidor em http://{HOST}:{servidor.server_address[1]} (CTRL+C para sair)")
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        if trabalhos is not None:
+            trabalhos.fechar()
+
+if __name__ == "__main__":
+    sys.exit(main())